@@ -0,0 +1 @@
+# performans ölçüm scriptleri: repo kökünden `python -m benchmarks.<isim>` ile çalıştırılır
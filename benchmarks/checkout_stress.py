@@ -0,0 +1,115 @@
+# checkout.checkout_cart: çok iş parçacıklı flaş indirim senaryosu, fazla satış olmadığını doğrular
+#   python -m benchmarks.checkout_stress --threads 16 --customers 800 --stock 500
+#   python -m benchmarks.checkout_stress --database-url mysql+pymysql://...
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+
+from website import db
+from website.checkout import checkout_cart, OutOfStockError
+from website.models import Cart, Customer, Order, Product
+
+from .common import make_app, report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--customers', type=int, default=800)
+    parser.add_argument('--products', type=int, default=5, help='herkesin yarıştığı sıcak ürün sayısı')
+    parser.add_argument('--stock', type=int, default=500, help='ürün başına başlangıç stoğu')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    # Varsayılan: iş parçacıklarının paylaşabileceği geçici SQLite dosyası
+    path = None
+    if args.database_url is None:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        args.database_url = f'sqlite:///{path}'
+    app = make_app(args.database_url, SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 60}}
+                   if args.database_url.startswith('sqlite') else {})
+
+    rng = random.Random(3)
+    with app.app_context():
+        db.session.execute(Customer.__table__.insert(), [
+            dict(email=f'stres{i}@ornek.com', phone=f'06{i:09d}', first_name='Stres', last_name=str(i),
+                 password_hash='-', is_banned=False) for i in range(args.customers)])
+        db.session.execute(Product.__table__.insert(), [
+            dict(product_name=f'Flaş Ürün {i}', current_price=100.0, previous_price=200.0, in_stock=args.stock,
+                 product_picture='/static/uploads/atk.jpg', category='electronics', is_active=True)
+            for i in range(args.products)])
+        db.session.commit()
+        customer_ids = [row[0] for row in db.session.query(Customer.id).all()]
+        product_ids = [row[0] for row in db.session.query(Product.id).all()]
+
+        carts = []
+        for customer_id in customer_ids:
+            for product_id in rng.sample(product_ids, rng.randint(1, len(product_ids))):
+                carts.append(dict(customer_link=customer_id, product_link=product_id, quantity=rng.randint(1, 3)))
+        db.session.execute(Cart.__table__.insert(), carts)
+        db.session.commit()
+        db.session.remove()
+
+    queue = list(customer_ids)
+    lock = threading.Lock()
+    counts = {'ok': 0, 'out_of_stock': 0, 'error': 0}
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    if not queue:
+                        break
+                    customer_id = queue.pop()
+                try:
+                    checkout_cart(customer_id, payment_id=f'STRES-{customer_id}', status='Onaylanmayı Bekliyor')
+                    outcome = 'ok'
+                except OutOfStockError:
+                    outcome = 'out_of_stock'
+                except Exception as e:
+                    db.session.rollback()
+                    print(f'hata: {e}')
+                    outcome = 'error'
+                with lock:
+                    counts[outcome] += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        sold = dict(db.session.query(Order.product_link, func.sum(Order.quantity)).group_by(Order.product_link).all())
+        stock = dict(db.session.query(Product.id, Product.in_stock).all())
+        for product_id in product_ids:
+            assert stock[product_id] >= 0, f'negatif stok: ürün {product_id} = {stock[product_id]}'
+            assert sold.get(product_id, 0) + stock[product_id] == args.stock, \
+                f'fazla satış: ürün {product_id} satılan {sold.get(product_id, 0)}, kalan {stock[product_id]}'
+        remaining_carts = db.session.query(func.count(Cart.id)).scalar()
+        db.session.remove()
+
+    report(f'{args.threads} iş parçacığı, {args.customers} müşteri, {args.products} ürün x {args.stock} stok', [
+        ('başarılı checkout', counts['ok']),
+        ('stok yetersiz', counts['out_of_stock']),
+        ('hata', counts['error']),
+        ('satılan adet', sum(sold.values())),
+        ('kalan sepet satırı', remaining_carts),
+        ('checkout/sn', f'{len(customer_ids) / elapsed:.0f}'),
+        ('fazla satış', 'yok'),
+    ])
+    if path:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
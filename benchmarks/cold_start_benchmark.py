@@ -0,0 +1,81 @@
+# yeni worker'ın ilk yanıt süresi: bytecode önbelleği ve açılışta ön derleme ile
+#   python -m benchmarks.cold_start_benchmark --runs 3
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from .common import report
+
+
+# Her ölçüm temiz bir süreçte: içe aktarma, create_app ve ilk istekler dahil
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+from website import db
+from website.models import Customer, Product
+from benchmarks.common import make_app
+config = json.loads(sys.argv[1])
+app = make_app(**config)
+booted = time.perf_counter()
+with app.app_context():
+    user = Customer(email='alici@ornek.com', phone='05330000000', first_name='Ayşe', last_name='Alıcı')
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.add_all([Product(product_name=f'Ürün {i}', current_price=100, previous_price=120, in_stock=5,
+                                category='electronics', product_picture='/static/uploads/atk.jpg') for i in range(40)])
+    db.session.commit()
+client = app.test_client()
+with client.session_transaction() as session:
+    session['_user_id'] = '1'
+timings = []
+for path in ('/category/electronics', '/cart', '/category/sales', '/category/electronics'):
+    t = time.perf_counter()
+    assert client.get(path).status_code == 200
+    timings.append(time.perf_counter() - t)
+print(json.dumps({'boot': booted - start, 'first': timings[0], 'pages': sum(timings[:3]), 'warm': timings[3]}))
+'''
+
+
+def measure(config):
+    output = subprocess.run([sys.executable, '-c', CHILD, json.dumps(config)], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='jinja-bytecode-')
+    scenarios = [
+        ('önbellek yok', {}, False),
+        ('bytecode önbelleği, boş dizin', {'JINJA_BYTECODE_CACHE_DIR': cache_dir}, True),
+        ('bytecode önbelleği, dolu dizin', {'JINJA_BYTECODE_CACHE_DIR': cache_dir}, False),
+        ('ön derleme, önbellek yok', {'TEMPLATE_WARM_UP': True}, False),
+        ('ön derleme + dolu bytecode önbelleği', {'JINJA_BYTECODE_CACHE_DIR': cache_dir, 'TEMPLATE_WARM_UP': True},
+         False),
+    ]
+
+    rows = []
+    for label, config, clear in scenarios:
+        results = []
+        for _ in range(args.runs):
+            if clear:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            results.append(measure(config))
+        median = {key: statistics.median(r[key] for r in results) * 1000 for key in results[0]}
+        rows.append((label, f"açılış {median['boot']:.0f} ms + ilk yanıt {median['first']:.0f} ms = "
+                            f"{median['boot'] + median['first']:.0f} ms, ilk 3 sayfa {median['pages']:.0f} ms, "
+                            f"ısınmış sayfa {median['warm']:.1f} ms"))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report(f'soğuk başlangıç, {args.runs} çalıştırmanın ortancası', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# benchmark scriptlerinin ortak yardımcıları
+import random
+import time
+from contextlib import contextmanager
+
+from website import create_app, db
+
+
+BRANDS = ['Apple', 'Samsung', 'Xiaomi', 'Oraimo', 'Philips', 'Arçelik', 'Vestel', 'Beko', 'Karaca', 'Koton',
+          'LC Waikiki', 'İpekyol', 'Sony', 'Logitech', 'Şölen', 'Ülker', 'Eti', 'Paşabahçe', 'Nike', 'Adidas']
+NOUNS = ['Telefon', 'Kulaklık', 'Akıllı Saat', 'Soundbar', 'Ekran', 'Çaydanlık', 'Tencere', 'Gömlek', 'Ceket',
+         'Ayakkabı', 'Klavye', 'Mouse', 'Oyun Konsolu', 'Şampuan', 'Parfüm', 'Kamp Çadırı', 'Bisiklet',
+         'Işıklı Ayna', 'Çanta', 'Güneş Gözlüğü', 'Bardak Seti', 'Ütü', 'Süpürge', 'Kılıf', 'Şarj Aleti']
+ADJECTIVES = ['Pro', 'Mini', 'Max', 'Ultra', 'Lite', 'Siyah', 'Beyaz', 'Kırmızı', 'Yeşil', 'Gümüş',
+              'Kablosuz', 'Çelik', 'Pamuklu', 'Deri', 'Su Geçirmez', 'Büyük Boy', 'Küçük Boy']
+CATEGORIES = ['home_living', 'fashion', 'electronics', 'gaming', 'accessories', 'beauty', 'sports_outdoor']
+
+
+def product_name(rng):
+    return f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randint(1, 999)}'
+
+
+def make_app(database_url='sqlite://', **config):
+    config.setdefault('SQLALCHEMY_DATABASE_URI', database_url)
+    config.setdefault('WTF_CSRF_ENABLED', False)
+    config.setdefault('TESTING', True)
+    return create_app(config)
+
+
+def seed_products(count, seed=42, batch=5000):
+    from website.models import Product
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        price = round(rng.uniform(50, 50000), 2)
+        rows.append(dict(product_name=product_name(rng), current_price=price,
+                         previous_price=price if rng.random() < 0.7 else round(price * rng.uniform(1.05, 1.6), 2),
+                         in_stock=rng.randint(0, 500), product_picture='/static/uploads/atk.jpg',
+                         category=rng.choice(CATEGORIES), is_active=rng.random() > 0.05))
+        if len(rows) == batch:
+            db.session.execute(Product.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Product.__table__.insert(), rows)
+    db.session.commit()
+
+
+@contextmanager
+def timer(results, name):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def report(title, rows):
+    print(f'\n{title}')
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f'  {name.ljust(width)}  {value}')
@@ -0,0 +1,71 @@
+# ürün ızgarası render süresi: parça önbelleği kapalı ve açık
+#   python -m benchmarks.fragment_cache_benchmark --products 2000 --requests 300
+import argparse
+import random
+import time
+
+from website import db
+from website.fragments import fragment_cache
+from website.models import Customer, Favorite
+
+from .common import CATEGORIES, make_app, report, seed_products
+
+
+PAGES = ['/shop', '/category/sales', '/search?q=Pro'] + [f'/category/{name}' for name in CATEGORIES]
+
+
+def run(app, clients, requests, seed=7):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(requests):
+        rng.choice(clients).get(rng.choice(PAGES))
+    return (time.perf_counter() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_products(args.products)
+        rng = random.Random(3)
+        users = []
+        for i in range(args.users):
+            user = Customer(email=f'alici{i}@ornek.com', phone=f'0533{i:07d}', first_name='Alıcı', last_name=str(i))
+            user.password_hash = 'x'
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all([Favorite(customer_link=user.id, product_link=product_id)
+                            for user in users for product_id in rng.sample(range(1, args.products + 1), 15)])
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    clients = []
+    for user_id in user_ids:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+        clients.append(client)
+
+    rows = []
+    for enabled in (False, True):
+        app.config['FRAGMENT_CACHE_ENABLED'] = fragment_cache.enabled = enabled
+        fragment_cache.clear()
+        run(app, clients, len(PAGES))  # ısınma: şablon derleme
+        ms = run(app, clients, args.requests)
+        label = 'önbellek açık' if enabled else 'önbellek kapalı'
+        rows.append((label, f'{ms:.1f} ms/istek'))
+    stats = fragment_cache.stats()
+    rows.append(('parça önbelleği', f"isabet oranı {stats['hit_rate']:.0%}, {stats['entries']} parça, "
+                                    f"{stats['bytes'] / 1024:.0f} KB"))
+
+    report(f'{args.requests} istek, {len(PAGES)} sayfa, {args.users} kullanıcı, {args.products} ürün', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# şifre özetleme maliyeti: her parametre ayarında çekirdek başına saniyede giriş
+#   python -m benchmarks.hashing_benchmark --logins 40
+import argparse
+import os
+import threading
+import time
+
+from website.hashing import PasswordHasher
+
+from .common import report
+
+
+METHODS = ['pbkdf2:sha256:260000', 'pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1']
+
+
+def logins_per_second(hasher, pwhash, logins, threads):
+    # Çok iş parçacıklı bir sunucu gibi: her iş parçacığı sırayla giriş doğrular
+    per_thread = max(1, logins // threads)
+
+    def worker():
+        for _ in range(per_thread):
+            assert hasher.verify(pwhash, 'dogru-sifre')
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    rows = []
+    for method in METHODS:
+        inline = PasswordHasher(method=method, workers=0)
+        pooled = PasswordHasher(method=method, workers=args.workers, max_pending=args.workers * 4)
+        pwhash = inline.hash('dogru-sifre')
+        pooled.verify(pwhash, 'dogru-sifre')  # havuzu ısıt
+
+        start = time.perf_counter()
+        for _ in range(5):
+            inline.verify(pwhash, 'dogru-sifre')
+        single_ms = (time.perf_counter() - start) / 5 * 1000
+
+        rate = logins_per_second(pooled, pwhash, args.logins, args.threads)
+        pooled.shutdown()
+        rows.append((method, f'{single_ms:.0f} ms/doğrulama, havuz {rate:.1f} giriş/sn, '
+                             f'çekirdek başına {rate / args.workers:.1f} giriş/sn'))
+
+    report(f'{args.workers} süreçli havuz, {args.threads} istek iş parçacığı', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# /process-payment: aynı idempotency anahtarıyla eş zamanlı tekrar istekler tek sipariş üretmeli
+#   python -m benchmarks.idempotency_replay --threads 16
+import argparse
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import func
+
+from website import db
+from website.models import Cart, Customer, Order, Product
+
+from .common import make_app, report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = make_app(f'sqlite:///{path}', SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 60}})
+
+    with app.app_context():
+        customer = Customer(email='tekrar@ornek.com', phone='05550000000', first_name='Tekrar', last_name='Test',
+                            password_hash='-')
+        product = Product(product_name='Flaş Ürün', current_price=100.0, previous_price=150.0, in_stock=1000,
+                          product_picture='/static/uploads/atk.jpg', category='electronics')
+        db.session.add_all([customer, product])
+        db.session.commit()
+        customer_id, product_id = customer.id, product.id
+        db.session.remove()
+
+    def client_for():
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(customer_id)
+            session['_fresh'] = True
+        return client
+
+    rows = []
+    for round_no in range(args.rounds):
+        with app.app_context():
+            db.session.add(Cart(customer_link=customer_id, product_link=product_id, quantity=2))
+            db.session.commit()
+            db.session.remove()
+
+        key = uuid.uuid4().hex
+        barrier = threading.Barrier(args.threads)
+        results = []
+        lock = threading.Lock()
+
+        def submit():
+            client = client_for()
+            barrier.wait()
+            response = client.post('/process-payment', data={'selected_address': '1', 'cardNumber': '4111',
+                                                              'idempotency_key': key})
+            with client.session_transaction() as session:
+                flashes = tuple(message for _, message in session.get('_flashes', []))
+            with lock:
+                results.append((response.status_code, response.headers.get('Location'), flashes))
+
+        threads = [threading.Thread(target=submit) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        outcomes = Counter(results)
+        assert len(outcomes) == 1, f'farklı yanıtlar: {outcomes}'
+        rows.append((f'tur {round_no + 1}', f'{args.threads} istek, tek yanıt {results[0][:2]}, {elapsed * 1000:.0f} ms'))
+
+    with app.app_context():
+        orders = db.session.query(func.count(Order.id)).scalar()
+        stock = db.session.get(Product, product_id).in_stock
+        db.session.remove()
+    assert orders == args.rounds, f'{args.rounds} sipariş beklenirken {orders} oluştu'
+    assert stock == 1000 - 2 * args.rounds, f'stok birden fazla düşüldü: {stock}'
+
+    rows.append(('oluşan sipariş', orders))
+    rows.append(('kalan stok', stock))
+    report(f'{args.rounds} tur x {args.threads} eş zamanlı tekrar', rows)
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
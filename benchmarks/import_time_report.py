@@ -0,0 +1,74 @@
+# create_app açılışında modül başına içe aktarma süresi (python -X importtime)
+#   python -m benchmarks.import_time_report --top 25
+#   python -m benchmarks.import_time_report --json importtime.json
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from .common import report
+
+
+CHILD = r'''
+import json, sys
+from benchmarks.common import make_app
+make_app(**json.loads(sys.argv[1]))
+'''
+
+# "import time:      self [us] | cumulative | imported package"
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def collect(config):
+    """Runs create_app in a fresh interpreter and returns [(module, self_us, cumulative_us, depth)]."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, json.dumps(config)], check=True,
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), len(indent) // 2))
+    return rows
+
+
+def by_package(rows):
+    totals = defaultdict(int)
+    for module, own, _, _ in rows:
+        totals[module.split('.')[0]] += own
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--profile', default='production', choices=['development', 'production'])
+    parser.add_argument('--json', metavar='PATH', help='tüm modülleri JSON olarak yaz')
+    args = parser.parse_args()
+
+    rows = collect({'STARTUP_PROFILE': args.profile})
+    total = sum(own for _, own, _, _ in rows)
+
+    report(f'toplam içe aktarma {total / 1000:.0f} ms, {len(rows)} modül ({args.profile})', [
+        (package, f'{own / 1000:.1f} ms ({own / total:.0%})') for package, own in by_package(rows)[:args.top]
+    ])
+    report('en yavaş modüller (kendi süresi / kümülatif)', [
+        (module, f'{own / 1000:.1f} ms / {cumulative / 1000:.1f} ms')
+        for module, own, cumulative, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]
+    ])
+    report('website modülleri (kümülatif)', [
+        (module, f'{cumulative / 1000:.1f} ms')
+        for module, _, cumulative, _ in sorted(rows, key=lambda row: row[2], reverse=True)
+        if module.split('.')[0] == 'website'
+    ][:args.top])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([{'module': module, 'self_us': own, 'cumulative_us': cumulative, 'depth': depth}
+                       for module, own, cumulative, depth in rows], f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
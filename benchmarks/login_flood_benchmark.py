@@ -0,0 +1,69 @@
+# /login: şifre deneme seli altında CPU tüketimi, hız sınırı kapalı ve açık
+#   python -m benchmarks.login_flood_benchmark --threads 8 --attempts 400
+import argparse
+import threading
+import time
+
+from website import db
+from website.kvstore import kv_store
+from website.models import Customer
+
+from .common import make_app, report
+
+
+def flood(app, args, spread_ips):
+    """Returns (cpu seconds, wall seconds, rejected, passed to hashing)."""
+    counter = {'rejected': 0, 'hashed': 0}
+    lock = threading.Lock()
+    per_thread = args.attempts // args.threads
+
+    def attacker(n):
+        client = app.test_client()
+        for i in range(per_thread):
+            # Tek hesaba karşı: ya tek IP'den ya da dağıtık bir botnetten
+            ip = f'10.0.{n}.{i % 250}' if spread_ips else '10.0.0.1'
+            response = client.post('/login', data={'identifier': 'kurban@ornek.com', 'password': f'yanlis{i}'},
+                                   environ_base={'REMOTE_ADDR': ip})
+            with lock:
+                counter['rejected' if response.status_code == 302 else 'hashed'] += 1
+
+    threads = [threading.Thread(target=attacker, args=(n,)) for n in range(args.threads)]
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.process_time() - cpu, time.perf_counter() - wall, counter['rejected'], counter['hashed']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=400)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        victim = Customer(email='kurban@ornek.com', phone='05440000000', first_name='Kurban', last_name='Hesap')
+        victim.password = 'gercek-sifre'
+        db.session.add(victim)
+        db.session.commit()
+        db.session.remove()
+
+    rows = []
+    for enabled in (False, True):
+        for spread in (False, True):
+            app.config['RATE_LIMIT_ENABLED'] = enabled
+            with app.app_context():
+                kv_store().clear()
+            cpu, wall, rejected, hashed = flood(app, args, spread)
+            label = f"sınır {'açık' if enabled else 'kapalı'}, {'dağıtık IP' if spread else 'tek IP'}"
+            rows.append((label, f'CPU {cpu:.2f} s ({cpu / wall:.0%} çekirdek), '
+                                f'{hashed} şifre kontrolü, {rejected} ucuz ret'))
+
+    report(f'{args.attempts} başarısız giriş denemesi, {args.threads} iş parçacığı', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# e-posta: istek içinde gönderim ile kuyruğa yazma, tekli ile toplu (messageVersions) teslimat
+#   python -m benchmarks.mail_benchmark --emails 500 --latency 0.2
+import argparse
+import time
+
+from website import db
+from website.mail import mailer, StubTransport
+from website.models import Customer, EmailOutbox
+
+from .common import make_app, report
+
+
+def drain(batch_size, app):
+    app.config['MAIL_BATCH_SIZE'] = batch_size
+    start = time.perf_counter()
+    while mailer.process_batch():
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--emails', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.2, help='API çağrısı başına sahte gecikme (s)')
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app(MAIL_TRANSPORT='stub', MAIL_WORKERS=0, MAIL_BACKOFF=0)
+    with app.app_context():
+        customer = Customer(email='posta@ornek.com', phone='05330000000', first_name='Posta', last_name='Test',
+                            password_hash='-')
+        db.session.add(customer)
+        db.session.commit()
+
+        transport = StubTransport(latency=args.latency)
+        mailer.transport = transport
+
+        # 1) İstek süresi: eski yol her istekte API'yi bekliyordu
+        message = EmailOutbox(to_email=customer.email, subject='Kod', html='<h1>123456</h1>')
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            transport.send_batch([message])
+        inline_ms = (time.perf_counter() - start) / args.requests * 1000
+
+        client = app.test_client()
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.post('/forgot-password', data={'email': customer.email})
+        queued_ms = (time.perf_counter() - start) / args.requests * 1000
+        drain(50, app)
+
+        # 2) Teslimat: tek tek ile toplu
+        results = {}
+        for batch_size in (1, 50):
+            for i in range(args.emails):
+                db.session.add(EmailOutbox(to_email=f'alici{i}@ornek.com', subject='Kampanya', html=f'<p>{i}</p>'))
+            db.session.commit()
+            calls = transport.calls
+            elapsed = drain(batch_size, app)
+            results[batch_size] = (elapsed, transport.calls - calls)
+
+        # 3) Geçici hata: yeniden deneme ile teslim edilir
+        transport.fail_times = 2
+        db.session.add(EmailOutbox(to_email='tekrar@ornek.com', subject='Tekrar', html='<p>x</p>'))
+        db.session.commit()
+        for _ in range(3):
+            mailer.process_batch()
+        retried = EmailOutbox.query.filter_by(to_email='tekrar@ornek.com').one()
+
+        report(f'{args.emails} e-posta, API gecikmesi {args.latency}s', [
+            ('istek içinde gönderim (ms/istek)', f'{inline_ms:.1f}'),
+            ('kuyruğa yazma (ms/istek)', f'{queued_ms:.1f}'),
+            ('tekli teslimat', f'{results[1][0]:.1f} s, {results[1][1]} API çağrısı'),
+            ('toplu teslimat (50)', f'{results[50][0]:.1f} s, {results[50][1]} API çağrısı'),
+            ('geçici hata sonrası', f'{retried.status}, {retried.attempts} deneme'),
+        ])
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# admin.order_view: sipariş başına tembel yüklenen müşteri/ürün ile birleşik sorgunun karşılaştırması
+#   python -m benchmarks.order_console_benchmark --orders 100000
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from website import db
+from website.forms import ORDER_STATUS_CHOICES
+from website.instrumentation import record_queries
+from website.models import Customer, Order
+
+from .common import make_app, seed_products, report
+
+
+def seed_customers(count, batch=5000):
+    rows = []
+    for i in range(count):
+        rows.append(dict(email=f'musteri{i}@ornek.com', phone=f'05{i:09d}', first_name=f'Ad{i}',
+                         last_name=f'Soyad{i}', password_hash='-', is_banned=False))
+        if len(rows) == batch:
+            db.session.execute(Customer.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Customer.__table__.insert(), rows)
+    db.session.commit()
+
+
+def seed_orders(count, customers, products, seed=11, batch=5000):
+    rng = random.Random(seed)
+    statuses = [value for value, _ in ORDER_STATUS_CHOICES]
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = []
+    for i in range(count):
+        rows.append(dict(quantity=rng.randint(1, 3), price=round(rng.uniform(50, 5000), 2),
+                         status=rng.choice(statuses), payment_id=f'PAY{i:08d}',
+                         date_created=start + timedelta(minutes=i * 365 * 24 * 60 // count),
+                         customer_link=rng.randint(1, customers), product_link=rng.randint(1, products)))
+        if len(rows) == batch:
+            db.session.execute(Order.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Order.__table__.insert(), rows)
+    db.session.commit()
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        with record_queries() as stats:
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return stats.count, sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default='sqlite://')
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    with app.app_context():
+        if Order.query.count() < args.orders:
+            seed_customers(args.customers)
+            seed_products(args.products)
+            seed_orders(args.orders, args.customers, args.products)
+
+        def lazy_page():
+            # Eski görünüm: siparişler tek sorgu, her satırda müşteri ve ürün ayrı sorgu
+            for order in Order.query.order_by(Order.id.desc()).limit(40).all():
+                order.customer.email, order.product.product_name
+            db.session.expunge_all()
+
+        lazy_queries, lazy_ms = measure(lazy_page, args.repeat)
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+
+    email = f'musteri{args.customers // 2}@ornek.com'
+    today = datetime.utcnow().date()
+    scenarios = [
+        ('ilk sayfa', '/view-orders'),
+        ('durum', '/view-orders?status=Teslim+Edildi'),
+        ('tarih aralığı', f'/view-orders?date_from={today - timedelta(days=30)}&date_to={today}'),
+        ('e-posta', f'/view-orders?email={email}'),
+        ('ödeme no', f'/view-orders?payment_id=PAY{args.orders // 2:08d}'),
+    ]
+
+    rows = [('eski (tembel) yükleme', f'{lazy_queries} sorgu, {lazy_ms:.1f} ms (yalnız sorgular)')]
+    for name, url in scenarios:
+        def get():
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        queries, ms = measure(get, args.repeat)
+        rows.append((name, f'{queries} sorgu, {ms:.1f} ms'))
+
+    report(f'{args.orders} sipariş, 40 satırlık sayfa (medyan)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# ürün ızgarası sayfa ağırlığı: orijinal görseller ve boyut varyantları (WebP / JPEG-PNG)
+#   python -m benchmarks.page_weight_benchmark --products 40
+import argparse
+import os
+import re
+import tempfile
+
+from website import db
+from website.images import image_pipeline, source_path
+from website.models import Customer, Product
+
+from .common import make_app, report
+
+
+VARIANT_URL = '/bench-variants'
+IMG_PATTERN = re.compile(r'<img [^>]*?src="([^"]+)"')
+SOURCE_PATTERN = re.compile(r'<source type="image/webp" srcset="([^"]+)" sizes="(\d+)px"')
+
+
+def pick(srcset, slot, dpr):
+    # Tarayıcı gibi: slot * dpr genişliğini karşılayan en küçük aday, yoksa en genişi
+    candidates = sorted((int(width[:-1]), url) for url, width in (entry.split() for entry in srcset.split(', ')))
+    for width, url in candidates:
+        if width >= slot * dpr:
+            return url
+    return candidates[-1][1]
+
+
+def file_size(app, url, folder):
+    if url.startswith(VARIANT_URL):
+        return os.path.getsize(os.path.join(folder, url[len(VARIANT_URL) + 1:]))
+    return os.path.getsize(source_path(url, app.root_path))
+
+
+def page_bytes(app, client, folder, dpr):
+    html = client.get('/category/electronics').get_data(as_text=True)
+    webp = SOURCE_PATTERN.findall(html)
+    if webp:
+        urls = [pick(srcset, int(slot), dpr) for srcset, slot in webp]
+    else:
+        urls = IMG_PATTERN.findall(html)
+        urls = [url for url in urls if url.startswith(('/media/', '/static/uploads/', './media/'))]
+    return len(urls), sum(file_size(app, url, folder) for url in urls)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=40)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='variants-')
+    app = make_app(IMAGE_ASYNC=False, IMAGE_VARIANT_FOLDER=folder, IMAGE_VARIANT_URL=VARIANT_URL)
+    media = os.path.join(app.root_path, '..', 'media')
+    pictures = [f'/media/{name}' for name in sorted(os.listdir(media))] + ['/static/uploads/atk.jpg']
+
+    with app.app_context():
+        shopper = Customer(email='alici@ornek.com', phone='05330000000', first_name='Ayşe', last_name='Alıcı')
+        shopper.password_hash = 'x'
+        db.session.add(shopper)
+        db.session.add_all([Product(product_name=f'Ürün {i}', current_price=100, previous_price=100, in_stock=5,
+                                    category='electronics', product_picture=pictures[i % len(pictures)])
+                            for i in range(args.products)])
+        db.session.commit()
+        shopper_id = shopper.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(shopper_id)
+
+    rows = []
+    count, before = page_bytes(app, client, folder, dpr=1)
+    rows.append(('orijinal görseller', f'{count} görsel, {before / 1024:.0f} KB'))
+
+    with app.app_context():
+        processed, failed = image_pipeline.backfill()
+    rows.append(('backfill', f'{processed} ürün işlendi, {failed} başarısız'))
+
+    for dpr in (1, 2):
+        count, after = page_bytes(app, client, folder, dpr=dpr)
+        rows.append((f'WebP varyant, DPR {dpr}', f'{count} görsel, {after / 1024:.0f} KB '
+                                                f'({after / before:.0%} orijinalin)'))
+
+    report(f'/category/electronics ilk sayfa, {args.products} ürün', rows)
+
+
+if __name__ == '__main__':
+    main()
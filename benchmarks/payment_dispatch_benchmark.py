@@ -0,0 +1,109 @@
+# /place-order: ağ geçidi çağrısı istek içinde (senkron) ile arka plan iş parçacığında (asenkron)
+#   python -m benchmarks.payment_dispatch_benchmark --orders 200 --workers 8 --latency 0.5
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from website import db
+from website.models import Cart, Customer, Order, Product
+from website.payments import payment_dispatcher, CONFIRMED_STATUS
+
+from .common import make_app, report
+
+
+def run(mode_async, args):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = make_app(f'sqlite:///{path}', SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 60}},
+                   PAYMENT_GATEWAY='fake', PAYMENT_FAKE_LATENCY=args.latency, PAYMENT_ASYNC=mode_async,
+                   PAYMENT_WORKERS=args.payment_workers, PAYMENT_WEBHOOK_SECRET='benchmark')
+
+    with app.app_context():
+        db.session.execute(Customer.__table__.insert(), [
+            dict(email=f'odeme{i}@ornek.com', phone=f'07{i:09d}', first_name='Ödeme', last_name=str(i),
+                 password_hash='-', is_banned=False) for i in range(args.orders)])
+        db.session.add(Product(product_name='Ürün', current_price=100.0, previous_price=100.0,
+                               in_stock=args.orders * 10, product_picture='/static/uploads/atk.jpg',
+                               category='electronics'))
+        db.session.commit()
+        customer_ids = [row[0] for row in db.session.query(Customer.id).all()]
+        db.session.execute(Cart.__table__.insert(), [
+            dict(customer_link=customer_id, product_link=1, quantity=1) for customer_id in customer_ids])
+        db.session.commit()
+        db.session.remove()
+
+    queue = list(customer_ids)
+    lock = threading.Lock()
+    latencies = []
+
+    def request_worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                customer_id = queue.pop()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(customer_id)
+                session['_fresh'] = True
+            start = time.perf_counter()
+            response = client.get('/place-order')
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 302, response.status_code
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=request_worker) for _ in range(args.workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    served = time.perf_counter() - start
+    payment_dispatcher.drain()
+    settled = time.perf_counter() - start
+
+    # Ağ geçidinin toplu webhook'u: tüm faturalar tek istekte onaylanır
+    with app.app_context():
+        invoices = [invoice_id for (invoice_id,) in db.session.query(Order.invoice_id).distinct()]
+        db.session.remove()
+    confirm_start = time.perf_counter()
+    response = app.test_client().post('/payments/webhook',
+                                      json=[{'invoice_id': invoice, 'state': 'COMPLETE', 'challenge': 'benchmark'}
+                                            for invoice in invoices])
+    confirm_time = time.perf_counter() - confirm_start
+    with app.app_context():
+        confirmed = Order.query.filter_by(status=CONFIRMED_STATUS).count()
+        db.session.remove()
+    os.remove(path)
+
+    latencies.sort()
+    return [
+        ('istek gecikmesi p50 (ms)', f'{latencies[len(latencies) // 2] * 1000:.1f}'),
+        ('istek gecikmesi p95 (ms)', f'{latencies[int(len(latencies) * 0.95)] * 1000:.1f}'),
+        ('istek işçisi doluluğu', f'{sum(latencies) / (args.workers * served):.0%}'),
+        ('işçi-saniye / sipariş', f'{sum(latencies) / len(latencies):.3f}'),
+        ('tüm istekler yanıtlandı (s)', f'{served:.2f}'),
+        ('tüm ödemeler gönderildi (s)', f'{settled:.2f}'),
+        ('webhook ile onaylanan', f'{confirmed} sipariş, tek istek {confirm_time * 1000:.0f} ms '
+                                  f'({response.get_json()})'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8, help='istek işçisi (gunicorn worker) sayısı')
+    parser.add_argument('--payment-workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.5, help='sahte ağ geçidi gecikmesi (s)')
+    args = parser.parse_args()
+
+    title = f'{args.orders} sipariş, {args.workers} istek işçisi, ağ geçidi gecikmesi {args.latency}s'
+    report(f'{title} - senkron', run(False, args))
+    report(f'{title} - asenkron', run(True, args))
+
+
+if __name__ == '__main__':
+    main()
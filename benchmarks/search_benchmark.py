@@ -0,0 +1,62 @@
+# views.search: eski ILIKE '%q%' taraması ile ters indeksin karşılaştırması
+#   python -m benchmarks.search_benchmark --products 200000
+import argparse
+import random
+import time
+
+from website import db
+from website.models import Product
+from website.cache import index_version
+from website.search import search_index
+
+from .common import make_app, seed_products, product_name, report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--database-url', default='sqlite://')
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    with app.app_context():
+        if Product.query.count() < args.products:
+            seed_products(args.products - Product.query.count())
+
+        rng = random.Random(7)
+        queries = []
+        for _ in range(args.queries):
+            words = product_name(rng).split()
+            # Kullanıcıların yazdığı gibi: bir kelime ya da yarım kelime
+            word = rng.choice(words[:-1])
+            queries.append(word if rng.random() < 0.5 else word[:max(3, len(word) - 2)])
+
+        start = time.perf_counter()
+        for q in queries:
+            Product.query.filter(Product.product_name.ilike(f'%{q}%')).all()
+        ilike_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        search_index.rebuild(index_version())
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for q in queries:
+            result = search_index.search(q)
+            if result.ids:
+                Product.query.filter(Product.id.in_(result.ids)).all()
+        index_time = time.perf_counter() - start
+
+        report(f'{args.products} ürün, {len(queries)} sorgu', [
+            ('ILIKE ortalama (ms)', f'{ilike_time / len(queries) * 1000:.2f}'),
+            ('indeks ortalama (ms)', f'{index_time / len(queries) * 1000:.2f}'),
+            ('hızlanma', f'{ilike_time / max(index_time, 1e-9):.1f}x'),
+            ('indeks kurulum (s)', f'{build_time:.2f}'),
+            ('terim sayısı', len(search_index._postings)),
+        ])
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
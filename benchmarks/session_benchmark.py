@@ -0,0 +1,57 @@
+# oturum arka uçları: istek başına sorgu ve süre (sql | kv | cookie)
+#   python -m benchmarks.session_benchmark --requests 200
+# sql arka ucu oturum çerezi olan her istekte server_session için fazladan bir SELECT çalıştırır;
+# KV_STORE_URL (Redis) ayarlıysa SESSION_BACKEND varsayılanı kv olur ve bu sorgu kalkar
+import argparse
+import time
+
+from website import db
+from website.instrumentation import record_queries
+from website.models import Customer
+
+from .common import make_app, seed_products, report
+
+
+BACKENDS = ('sql', 'kv', 'cookie')
+
+
+def measure(backend, requests, page):
+    app = make_app(SESSION_BACKEND=backend, RATE_LIMIT_ENABLED=False, USER_CACHE_TTL=60)
+    with app.app_context():
+        seed_products(200)
+        customer = Customer(email='oturum@ornek.com', phone='05670000000', first_name='Oturum', last_name='Test',
+                            password_hash='-')
+        db.session.add(customer)
+        db.session.commit()
+        customer_id = customer.id
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(customer_id)
+        session['_fresh'] = True
+    client.get(page)  # önbellekleri ısıt
+
+    with record_queries() as queries:
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert client.get(page).status_code == 200, page
+        elapsed = time.perf_counter() - start
+    return queries.count / requests, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--page', default='/shop')
+    args = parser.parse_args()
+
+    rows = []
+    for backend in BACKENDS:
+        queries, ms = measure(backend, args.requests, args.page)
+        rows.append((backend, f'{queries:.1f} sorgu/istek, {ms:.2f} ms'))
+    report(f'{args.page}, oturum açık kullanıcı, {args.requests} istek (yerel kv deposu)', rows)
+
+
+if __name__ == '__main__':
+    main()
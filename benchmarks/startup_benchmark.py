@@ -0,0 +1,91 @@
+# açılış süresi: içe aktarma, create_app ve ilk yanıt, development ve production profilleriyle
+#   python -m benchmarks.startup_benchmark --runs 5
+#   python -m benchmarks.startup_benchmark --append startup.jsonl   (sonuçları zaman içinde izlemek için)
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .common import report
+
+
+# Her ölçüm temiz bir süreçte; tablolar önceden oluşturulmuş bir veritabanına bağlanılır
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+from benchmarks.common import make_app
+imported = time.perf_counter()
+app = make_app(**json.loads(sys.argv[1]))
+created = time.perf_counter()
+assert app.test_client().get('/').status_code == 200
+served = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported, 'first_request': served - created}))
+'''
+
+PROFILES = ('development', 'production')
+
+
+def measure(config):
+    output = subprocess.run([sys.executable, '-c', CHILD, json.dumps(config)], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare(database_url):
+    from website import db
+    from .common import make_app, seed_products
+
+    app = make_app(database_url)
+    with app.app_context():
+        seed_products(200)
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-url', help='tabloları hazır bir veritabanı (varsayılan: geçici SQLite dosyası)')
+    parser.add_argument('--append', metavar='PATH', help='ortanca sonuçları JSON satırı olarak bu dosyaya ekle')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    path = None
+    if not database_url:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+        prepare(database_url)
+
+    results = {}
+    try:
+        for profile in PROFILES:
+            config = {'SQLALCHEMY_DATABASE_URI': database_url, 'STARTUP_PROFILE': profile}
+            runs = [measure(config) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+            median['total'] = sum(median.values())
+            results[profile] = {key: round(value, 1) for key, value in median.items()}
+    finally:
+        if path:
+            os.unlink(path)
+
+    report(f'açılış, {args.runs} çalıştırmanın ortancası', [
+        (profile, f"içe aktarma {r['import']:.0f} ms + create_app {r['create_app']:.0f} ms + "
+                  f"ilk yanıt {r['first_request']:.0f} ms = {r['total']:.0f} ms")
+        for profile, r in results.items()
+    ])
+
+    if args.append:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        with open(args.append, 'a') as f:
+            f.write(json.dumps({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit or None,
+                                'python': platform.python_version(), 'runs': args.runs,
+                                'results': results}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# /search/suggest önek dizisinin arama gecikmesi (100k ve 1M ürün adı)
+#   python -m benchmarks.suggest_benchmark --sizes 100000 1000000
+import argparse
+import random
+import statistics
+import time
+
+from website.suggest import PrefixIndex
+
+from .common import product_name, report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(size)
+        index = PrefixIndex()
+        start = time.perf_counter()
+        index.load((i, product_name(rng)) for i in range(1, size + 1))
+        build_time = time.perf_counter() - start
+
+        prefixes = []
+        for _ in range(args.lookups):
+            word = rng.choice(product_name(rng).split())
+            prefixes.append(word[:rng.randint(1, len(word))])
+
+        samples = []
+        for prefix in prefixes:
+            t = time.perf_counter()
+            index.complete(prefix, limit=args.limit)
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+
+        t = time.perf_counter()
+        for i in range(100):
+            index._insert_locked(size + i + 1, product_name(rng))
+        insert_time = (time.perf_counter() - t) / 100
+
+        report(f'{size} ürün adı ({len(index)} anahtar)', [
+            ('kurulum (s)', f'{build_time:.2f}'),
+            ('p50 arama (µs)', f'{samples[len(samples) // 2] * 1e6:.1f}'),
+            ('p99 arama (µs)', f'{samples[int(len(samples) * 0.99)] * 1e6:.1f}'),
+            ('ortalama arama (µs)', f'{statistics.fmean(samples) * 1e6:.1f}'),
+            ('tekil ekleme (µs)', f'{insert_time * 1e6:.1f}'),
+        ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Flask-Login user_loader: her istekte Customer sorgusu ile önbellekten kimlik
+#   python -m benchmarks.user_cache_benchmark --requests 50
+# Önbellek yalnızca paylaşılan depoda (KV_STORE_URL, Redis) varsayılan olarak açık; süreç içi depoda
+# USER_CACHE_TTL varsayılanı 0, yani Redis'siz kurulumda bu kazanç yok. Burada TTL elle açılıp tek süreçte ölçülür
+import argparse
+import time
+
+from website import db
+from website.instrumentation import record_queries
+from website.models import Cart, Customer
+from website.usercache import stats
+
+from .common import make_app, seed_products, report
+
+
+PAGES = ['/shop', '/cart', '/favorites', '/orders', '/category/electronics']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=50, help='sayfa başına istek')
+    args = parser.parse_args()
+
+    app = make_app(RATE_LIMIT_ENABLED=False)
+    with app.app_context():
+        seed_products(200)
+        customer = Customer(email='kimlik@ornek.com', phone='05660000000', first_name='Kimlik', last_name='Test',
+                            password_hash='-')
+        db.session.add(customer)
+        db.session.commit()
+        cart = [Cart(customer_link=customer.id, product_link=product_id, quantity=1) for product_id in (1, 2, 3)]
+        db.session.add_all(cart)
+        db.session.commit()
+        customer_id, cart_id = customer.id, cart[0].id
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(customer_id)
+        session['_fresh'] = True
+
+    pages = PAGES + [f'/pluscart?cart_id={cart_id}']
+    results = {}
+    for ttl in (0, 60):
+        app.config['USER_CACHE_TTL'] = ttl
+        client.get('/shop')  # önbelleği ısıt
+        for page in pages:
+            with record_queries() as queries:
+                start = time.perf_counter()
+                for _ in range(args.requests):
+                    assert client.get(page).status_code == 200, page
+                elapsed = time.perf_counter() - start
+            results[(ttl, page)] = (queries.count / args.requests, elapsed / args.requests * 1000)
+
+    rows = []
+    for page in pages:
+        before, before_ms = results[(0, page)]
+        after, after_ms = results[(60, page)]
+        rows.append((page, f'{before:.0f} -> {after:.0f} sorgu/istek ({before - after:.0f} eksik), '
+                           f'{before_ms:.1f} -> {after_ms:.1f} ms'))
+    rows.append(('önbellek', stats()))
+    report(f'user_loader önbelleği kapalı -> açık (USER_CACHE_TTL elle 60; Redis olmadan varsayılan 0), '
+           f'sayfa başına {args.requests} istek', rows)
+
+
+if __name__ == '__main__':
+    main()
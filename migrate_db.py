@@ -1,13 +1,16 @@
-from website import create_app, db
-from sqlalchemy import text
+# şema göçlerini uygular (bkz. website/migrations.py), `flask db-upgrade` ile aynı işi yapar
+#   python migrate_db.py                      -> MySQL (create_app ayarları)
+#   python migrate_db.py sqlite:///local.db   -> yerel test veritabanı
+import sys
 
-app = create_app()
+from website import create_app
+from website.migrations import upgrade
+
+app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1]} if len(sys.argv) > 1 else None)
 
 with app.app_context():
-    try:
-        with db.engine.connect() as conn:
-            conn.execute(text("ALTER TABLE product ADD COLUMN is_active BOOLEAN DEFAULT TRUE;"))
-            conn.commit()
-            print("Migration successful: Added is_active column.")
-    except Exception as e:
-        print(f"Migration failed (might already exist): {e}")
+    applied = upgrade()
+    for revision in applied:
+        print(f"Migration successful: {revision}")
+    if not applied:
+        print("Schema is up to date.")
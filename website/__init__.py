@@ -1,6 +1,9 @@
+import os
+
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 
 db = SQLAlchemy()
@@ -10,7 +13,7 @@ def create_database():
     print('Database Created')
 
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'hbnwdvbn ajnbsjn ahe'
 
@@ -21,6 +24,22 @@ def create_app():
 
     app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
+    # Benchmark / yerel test için ayarları ezmek (örn. SQLite) mümkün
+    if test_config:
+        app.config.update(test_config)
+
+    # development: tablolar açılışta oluşturulur. production: şema yalnızca `flask db-upgrade` ile değişir,
+    # açılışta veritabanına gidilmez
+    app.config.setdefault('STARTUP_PROFILE', os.environ.get('STARTUP_PROFILE', 'development'))
+    app.config.setdefault('DB_CREATE_ALL', app.config['STARTUP_PROFILE'] != 'production')
+
+    # Ters vekil sayısı (nginx: 1). X-Forwarded-For yalnızca bu kadar vekile güvenilerek okunur ve
+    # hız sınırı gerçek istemci adresini görür; 0: başlık yok sayılır (vekilsiz kurulumda sahte adres engellenir)
+    app.config.setdefault('TRUSTED_PROXIES', 0)
+    if app.config['TRUSTED_PROXIES']:
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+
     db.init_app(app)
 
     @app.errorhandler(404)
@@ -33,19 +52,65 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(id):
-        return Customer.query.get(int(id))
+        return usercache.load_customer(id)
 
     from .views import views
     from .auth import auth
     from .admin import admin
     from .models import Customer, Cart, Product, Order
+    from .cache import product_cache
+    from .fragments import fragment_cache
+    from .sales import rebuild_sales_command
+    from .counters import rebuild_order_counters_command
+    from .migrations import upgrade_command, status_command
+    from .idempotency import purge_idempotency_keys_command
+    from .payments import payment_dispatcher, poll_payments_command
+    from .mail import mailer, mail_worker_command, mail_purge_command
+    from .hashing import password_hasher
+    from .images import image_pipeline, images_backfill_command
+    from .assets import assets_build_command
+    from .sessions import purge_sessions_command
+    from .templating import templates_compile_command
+    from . import assets, favorites, instrumentation, idempotency, kvstore, ratelimit, sessions, templating, usercache
 
     app.register_blueprint(views, url_prefix='/') # localhost:5000/about-us
     app.register_blueprint(auth, url_prefix='/') # localhost:5000/auth/change-password
     app.register_blueprint(admin, url_prefix='/')
 
-    with app.app_context():
-        create_database()
+    kvstore.init_app(app)
+    templating.init_app(app)
+    assets.init_app(app)
+    ratelimit.init_app(app)
+    sessions.init_app(app)
+    usercache.init_app(app)
+    favorites.init_app(app)
+    password_hasher.init_app(app)
+    product_cache.init_app(app)
+    fragment_cache.init_app(app)
+    instrumentation.init_app(app)
+    idempotency.init_app(app)
+    payment_dispatcher.init_app(app)
+    mailer.init_app(app)
+    image_pipeline.init_app(app)
+
+    app.cli.add_command(rebuild_sales_command)
+    app.cli.add_command(rebuild_order_counters_command)
+    app.cli.add_command(upgrade_command)
+    app.cli.add_command(status_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(poll_payments_command)
+    app.cli.add_command(mail_worker_command)
+    app.cli.add_command(mail_purge_command)
+    app.cli.add_command(purge_sessions_command)
+    app.cli.add_command(images_backfill_command)
+    app.cli.add_command(assets_build_command)
+    app.cli.add_command(templates_compile_command)
+
+    templating.warm_up(app)
+
+    if app.config['DB_CREATE_ALL']:
+        with app.app_context():
+            create_database()
 
     return app
 
@@ -1,36 +1,57 @@
 # websitemizin admin sayfasıyla ilgilenecek
 
-from flask import Blueprint, render_template, flash, send_from_directory, redirect, request
+from flask import Blueprint, render_template, flash, send_from_directory, redirect, request, jsonify, current_app
 from flask_login import login_required, current_user
-from .forms import ShopItemsForm, OrderForm
+from .forms import ShopItemsForm, OrderForm, ORDER_STATUS_CHOICES
 from werkzeug.utils import secure_filename
 from .models import Product, Order, Customer, Coupon
 from . import db
+from sqlalchemy import case, or_
+from sqlalchemy.orm import contains_eager
+from .cache import product_cache, bump_catalog_version
+from .fragments import fragment_cache
+from .search import search_index
+from .suggest import suggest_index
+from .images import image_pipeline
+from .pagination import paginate_keyset
+from .counters import move_orders, pending_orders_count
+from .sales import record_status_change, top_sellers
+from .usercache import invalidate_user, stats as user_cache_stats
 import os
+from datetime import datetime, timedelta
 
 
 admin = Blueprint('admin', __name__)
 
 
+def _sync_catalog(product, reindex=True):
+    # Ürün eklendi/düzenlendi/pasife alındı: tüm worker'ların önbelleğini düşür.
+    # reindex yalnızca ad, kategori veya aktiflik değiştiğinde: bu worker indeksleri yerinde
+    # günceller, diğerleri sürüm farkını görüp arka planda yeniden kurar
+    version = bump_catalog_version(reindex=reindex)
+    if reindex:
+        search_index.add_product(product, version)
+        suggest_index.update_product(product, version)
+
+
 @admin.context_processor
 def inject_pending_orders_count():
     if current_user.is_authenticated and current_user.id == 1:
-        pending_count = Order.query.filter_by(status='Onaylanmayı Bekliyor').count()
-        return dict(pending_orders_count=pending_count)
+        return dict(pending_orders_count=pending_orders_count())
     return dict(pending_orders_count=0)
 
 
 @admin.route('/media/<path:filename>')
 def get_image(filename):
-    return send_from_directory('../media', filename)
+    return send_from_directory('../media', filename, max_age=current_app.config['MEDIA_MAX_AGE'])
 
 
 @admin.route('/view-customers')
 @login_required
 def view_customers():
     if current_user.id == 1:
-        customers = Customer.query.filter(Customer.id != 1).all() # Exclude admin
-        return render_template('admin_template/view_customers.html', customers=customers)
+        page = paginate_keyset(Customer.query.filter(Customer.id != 1), [(Customer.id, False)]) # Exclude admin
+        return render_template('admin_template/view_customers.html', customers=page.items, page=page)
     return render_template('404.html')
 
 
@@ -42,6 +63,7 @@ def toggle_ban(customer_id):
         if customer:
             customer.is_banned = not customer.is_banned
             db.session.commit()
+            invalidate_user(customer.id)
             status = "yasaklandı" if customer.is_banned else "erişime açıldı"
             flash(f'Kullanıcı {status}.')
         return redirect('/view-customers')
@@ -146,7 +168,6 @@ def add_shop_items():
             
             # For new items, previous_price is same as current (no discount initially)
             previous_price = current_price
-            flash_sale = None
 
             file = form.product_picture.data
             file_name = secure_filename(file.filename)
@@ -167,8 +188,8 @@ def add_shop_items():
             new_shop_item.current_price = current_price
             new_shop_item.previous_price = previous_price
             new_shop_item.in_stock = in_stock
-            new_shop_item.flash_sale = flash_sale
             new_shop_item.category = category
+            new_shop_item.refresh_discount()
 
             # Store web-accessible path in DB
             new_shop_item.product_picture = f'/static/uploads/{file_name}'
@@ -176,6 +197,8 @@ def add_shop_items():
             try:
                 db.session.add(new_shop_item)
                 db.session.commit()
+                _sync_catalog(new_shop_item)
+                image_pipeline.submit(new_shop_item.id, new_shop_item.product_picture)
                 flash(f'{product_name} başarıyla eklendi')
                 print('Product Added')
                 return render_template('admin_template/add_shop_items.html', form=form)
@@ -192,8 +215,8 @@ def add_shop_items():
 @login_required
 def shop_items():
     if current_user.id == 1:
-        items = Product.query.order_by(Product.date_added.desc()).all()
-        return render_template('shop_items.html', items=items)
+        page = paginate_keyset(Product.query, [(Product.date_added, True), (Product.id, True)])
+        return render_template('shop_items.html', items=page.items, page=page)
     return render_template('404.html')
 
 
@@ -201,8 +224,8 @@ def shop_items():
 @login_required
 def update_products_list():
     if current_user.id == 1:
-        items = Product.query.order_by(Product.date_added.desc()).all()
-        return render_template('admin_template/update_products_list.html', items=items)
+        page = paginate_keyset(Product.query, [(Product.date_added, True), (Product.id, True)])
+        return render_template('admin_template/update_products_list.html', items=page.items, page=page)
     return render_template('404.html')
 
 
@@ -231,17 +254,15 @@ def update_product_price(item_id):
                         product.previous_price = product.current_price
                         product.current_price = new_price
                         
-                        # Calculate Discount
-                        if product.current_price < product.previous_price:
-                            discount = ((product.previous_price - product.current_price) / product.previous_price) * 100
-                            product.flash_sale = f"%{int(discount)} İndirim"
-                        else:
-                            product.flash_sale = None
+                        # Calculate Discount (discount_percent + flash_sale badge)
+                        product.refresh_discount()
                     
                     if new_stock is not None:
                         product.in_stock = new_stock
                         
                     db.session.commit()
+                    # Yalnızca fiyat/stok değişti: indeksler etkilenmez
+                    _sync_catalog(product, reindex=False)
                     flash(f'{product.product_name} güncellendi.', category='success')
                     
             except ValueError:
@@ -266,14 +287,18 @@ def update_item(item_id):
         form.previous_price.render_kw = {'placeholder': item_to_update.previous_price}
         form.current_price.render_kw = {'placeholder': item_to_update.current_price}
         form.in_stock.render_kw = {'placeholder': item_to_update.in_stock}
-        form.flash_sale.render_kw = {'placeholder': item_to_update.flash_sale}
 
         if form.validate_on_submit():
+            old_name = item_to_update.product_name
             product_name = form.product_name.data
             current_price = form.current_price.data
-            previous_price = form.previous_price.data
+            previous_price = form.previous_price.data or current_price
             in_stock = form.in_stock.data
-            flash_sale = form.flash_sale.data
+
+            # İndirim yüzdesi ve rozet metni fiyatlardan hesaplanır
+            item_to_update.current_price = current_price
+            item_to_update.previous_price = previous_price
+            item_to_update.refresh_discount()
 
             file = form.product_picture.data
 
@@ -287,10 +312,14 @@ def update_item(item_id):
                                                                 current_price=current_price,
                                                                 previous_price=previous_price,
                                                                 in_stock=in_stock,
-                                                                flash_sale=flash_sale,
-                                                                product_picture=file_path))
+                                                                flash_sale=item_to_update.flash_sale,
+                                                                discount_percent=item_to_update.discount_percent,
+                                                                product_picture=file_path,
+                                                                picture_variants=None))
 
                 db.session.commit()
+                _sync_catalog(item_to_update, reindex=product_name != old_name)
+                image_pipeline.submit(item_id, file_path)
                 flash(f'{product_name} başarıyla güncellendi')
                 print('Product Upadted')
                 return redirect('/shop-items')
@@ -311,13 +340,14 @@ def delete_item(item_id):
             # Soft Delete / Toggle Status
             item_to_delete.is_active = not item_to_delete.is_active
             db.session.commit()
+            _sync_catalog(item_to_delete)
             
             status_text = "Pasife alındı" if not item_to_delete.is_active else "Aktif edildi"
             flash(f'Ürün durumu güncellendi: {status_text}', category='success')
             
             # Check referrer to redirect back to the correct page
             if 'update-products-list' in request.referrer:
-                return redirect('/update-products-list')
+                return redirect(request.referrer) # aynı sayfaya (imleçle) geri dön
             return redirect('/shop-items')
             
         except Exception as e:
@@ -332,11 +362,53 @@ def delete_item(item_id):
 @login_required
 def order_view():
     if current_user.id == 1:
-        orders = Order.query.all()
-        return render_template('admin_template/view_orders.html', orders=orders)
+        query, filters = order_console_query(request.args)
+        page = paginate_keyset(query, [(Order.id, True)])
+        return render_template('admin_template/view_orders.html', orders=page.items, page=page,
+                               filters=filters, statuses=ORDER_STATUS_CHOICES)
     return render_template('404.html')
 
 
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        flash(f'Geçersiz tarih: {value}', 'error')
+        return None
+
+
+def order_console_query(args):
+    """Builds the filtered admin order query from request arguments.
+
+    Customer and product are joined and loaded in the same SELECT, so a page
+    of orders renders without one extra query per row.
+    """
+    filters = {key: args.get(key, '').strip() for key in ('status', 'date_from', 'date_to', 'email', 'payment_id')}
+
+    query = Order.query\
+        .join(Customer, Order.customer_link == Customer.id)\
+        .join(Product, Order.product_link == Product.id)\
+        .options(contains_eager(Order.customer), contains_eager(Order.product))
+
+    if filters['status']:
+        query = query.filter(Order.status == filters['status'])
+    if filters['payment_id']:
+        # Yerel ORD- referansı ya da ağ geçidi panelindeki fatura numarası
+        query = query.filter(or_(Order.payment_id == filters['payment_id'], Order.invoice_id == filters['payment_id']))
+    if filters['email']:
+        query = query.filter(Customer.email == filters['email'])
+    if filters['date_from']:
+        date_from = _parse_date(filters['date_from'])
+        if date_from:
+            query = query.filter(Order.date_created >= date_from)
+    if filters['date_to']:
+        date_to = _parse_date(filters['date_to'])
+        if date_to:
+            # Bitiş günü dahil
+            query = query.filter(Order.date_created < date_to + timedelta(days=1))
+    return query, filters
+
+
 @admin.route('/update-order/<int:order_id>', methods=['GET', 'POST'])
 @login_required
 def update_order(order_id):
@@ -348,18 +420,24 @@ def update_order(order_id):
             new_status = form.order_status.data
             
             # Stock Reduction Logic
+            product = None
             if new_status == 'Teslim Edildi' and order.status != 'Teslim Edildi':
-                product = Product.query.get(order.product_link)
+                product = product_cache.get(order.product_link)
                 if product:
-                    product.in_stock -= order.quantity
-                    if product.in_stock < 0:
-                        product.in_stock = 0
-                    flash(f'Stok güncellendi: {product.product_name} (Yeni Stok: {product.in_stock})', category='info')
+                    # Önbellekteki stok eski olabilir, düşümü (0'ın altına inmeden) veritabanında yapıyoruz
+                    remaining = Product.in_stock - order.quantity
+                    product.in_stock = case((remaining < 0, 0), else_=remaining)
 
+            record_status_change(order, order.status, new_status)
+            move_orders(order.status, new_status)
             order.status = new_status
 
             try:
                 db.session.commit()
+                # Çok satanlar ızgarası sıralamaya göre anahtarlanır; sürüm yalnızca admin stok düşümünde artar
+                if product:
+                    bump_catalog_version()
+                    flash(f'Stok güncellendi: {product.product_name} (Yeni Stok: {product.in_stock})', category='info')
                 flash(f'Sipariş {order_id} başarıyla güncellendi ({new_status})')
                 return redirect('/view-orders')
             except Exception as e:
@@ -376,36 +454,29 @@ def update_order(order_id):
 @login_required
 def most_sellers():
     if current_user.id == 1:
-        from sqlalchemy import func
-        
-        # Query: Sum quantity of users orders where status is 'Teslim Edildi', grouped by product
-        results = db.session.query(
-            Order.product_link, 
-            func.sum(Order.quantity).label('total_sold')
-        ).filter(Order.status == 'Teslim Edildi').group_by(Order.product_link).order_by(func.sum(Order.quantity).desc()).all()
-        
-        # Prepare data for template
-        most_selling_products = []
-        for r in results:
-            product = Product.query.get(r.product_link)
-            if product:
-                most_selling_products.append({
-                    'product': product,
-                    'total_sold': r.total_sold,
-                    # Optional: Calculate total revenue if prices didn't change too much, or stored in order
-                    # For now just showing quantity
-                })
+        # Sayaçlar update_order içinde güncelleniyor; ürünler tek sorguda geliyor
+        most_selling_products = [{'product': product, 'total_sold': total_sold}
+                                 for product, total_sold in top_sellers()]
                 
         return render_template('admin_template/most_sellers.html', products=most_selling_products)
     return render_template('404.html')
 
 
+@admin.route('/cache-stats')
+@login_required
+def cache_stats():
+    if current_user.id == 1:
+        return jsonify(product_cache=product_cache.stats(), user_cache=user_cache_stats(),
+                       fragment_cache=fragment_cache.stats())
+    return render_template('404.html')
+
+
 @admin.route('/customers')
 @login_required
 def display_customers():
     if current_user.id == 1:
-        customers = Customer.query.all()
-        return render_template('customers.html', customers=customers)
+        page = paginate_keyset(Customer.query, [(Customer.id, False)])
+        return render_template('customers.html', customers=page.items, page=page)
     return render_template('404.html')
 
 
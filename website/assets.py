@@ -0,0 +1,185 @@
+# statik dosyalar: içerik özetli adlar + manifest, uzun süreli önbellek ve önceden sıkıştırılmış gz/br kopyalar
+#   flask assets-build   (dağıtımdan önce; çıktı static/dist altına)
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+from werkzeug.exceptions import NotFound
+
+
+SOURCE_DIRS = ('css', 'js', 'images')
+DIST_DIR = 'dist'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map'}
+ONE_YEAR = 365 * 24 * 3600
+# İçerik özetiyle adlandırılan diğer dosyalar (görsel varyantları): adları değişmez, içerikleri de
+IMMUTABLE_STATIC_PREFIXES = ('uploads/variants/',)
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def _fingerprint(logical, content):
+    stem, ext = posixpath.splitext(logical)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _compress(path, content):
+    """Writes .gz (and .br when the brotli package is installed) next to ``path``
+    if they are smaller than the original. Returns the encodings written."""
+    written = []
+    gz = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gz) < len(content):
+        _write(path + '.gz', gz)
+        written.append('gzip')
+    try:
+        import brotli
+    except ImportError:
+        return written
+    br = brotli.compress(content, quality=11)
+    if len(br) < len(content):
+        _write(path + '.br', br)
+        written.append('br')
+    return written
+
+
+def _rewrite_css(logical, css, manifest):
+    # url(../images/x.jpg) -> url(../images/x.<özet>.jpg); manifestte olmayanlar aynen kalır
+    base = posixpath.dirname(logical)
+
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', target).groups()
+        resolved = posixpath.normpath(posixpath.join(base, path))
+        if resolved not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[resolved], base)
+        return f'url({quote}{hashed}{suffix}{quote})'
+
+    return CSS_URL.sub(replace, css.decode('utf-8')).encode('utf-8')
+
+
+def build_assets(static_folder):
+    """Copies css/js/images into static/dist under content-hashed names.
+
+    CSS is processed last so its ``url()`` references can point at the
+    hashed names. Writes manifest.json (logical name -> hashed name) and
+    returns the manifest.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    sources = []
+    for directory in SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(static_folder, directory)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                sources.append(os.path.relpath(path, static_folder).replace(os.sep, '/'))
+    sources.sort(key=lambda logical: (logical.endswith('.css'), logical))
+
+    manifest = {}
+    for logical in sources:
+        with open(os.path.join(static_folder, logical), 'rb') as f:
+            content = f.read()
+        if logical.endswith('.css'):
+            content = _rewrite_css(logical, content, manifest)
+        hashed = _fingerprint(logical, content)
+        target = os.path.join(dist, hashed)
+        if not os.path.exists(target):
+            _write(target, content)
+            if posixpath.splitext(logical)[1] in COMPRESSIBLE:
+                _compress(target, content)
+        manifest[logical] = hashed
+
+    _write(os.path.join(dist, 'manifest.json'), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _load_manifest(app):
+    path = app.config['ASSETS_MANIFEST']
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(filename):
+    """URL of a static file: the hashed /assets/ copy when it was built, else /static/."""
+    hashed = current_app.extensions['assets'].get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=hashed)
+
+
+def _accepted_encodings(filename):
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding]:
+            yield encoding, filename + suffix
+
+
+def serve_asset(filename):
+    """Serves a built asset with a one-year immutable Cache-Control.
+
+    A precompressed ``.br``/``.gz`` copy is sent when the client accepts it;
+    ETag and Last-Modified come from send_from_directory, so revalidation
+    gets a 304.
+    """
+    app = current_app
+    dist = os.path.join(app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = None
+    for encoding, compressed in _accepted_encodings(filename):
+        try:
+            response = send_from_directory(dist, compressed, mimetype=mimetype, max_age=app.config['ASSETS_MAX_AGE'])
+        except NotFound:
+            continue
+        response.headers['Content-Encoding'] = encoding
+        break
+    if response is None:
+        response = send_from_directory(dist, filename, mimetype=mimetype, max_age=app.config['ASSETS_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('ASSETS_MANIFEST', os.path.join(app.static_folder, DIST_DIR, 'manifest.json'))
+    app.config.setdefault('ASSETS_MAX_AGE', ONE_YEAR)
+    app.config.setdefault('MEDIA_MAX_AGE', 24 * 3600)  # /media adları sabit, içerik değişebilir
+    app.extensions['assets'] = _load_manifest(app)
+    app.add_url_rule('/assets/<path:filename>', 'asset', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.after_request
+    def immutable_static(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304) and \
+                (request.view_args or {}).get('filename', '').startswith(IMMUTABLE_STATIC_PREFIXES):
+            response.cache_control.max_age = app.config['ASSETS_MAX_AGE']
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+
+@click.command('assets-build')
+@with_appcontext
+def assets_build_command():
+    """Write content-hashed, precompressed static assets and their manifest."""
+    manifest = build_assets(current_app.static_folder)
+    current_app.extensions['assets'] = manifest
+    click.echo(f'{len(manifest)} dosya işlendi: {current_app.config["ASSETS_MANIFEST"]}')
@@ -1,16 +1,15 @@
 # kimlik doğrulama
 from flask import Blueprint, render_template, flash, redirect, request, session, url_for
 import random
-import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
 from .forms import LoginForm, SignUpForm, PasswordChangeForm, AddressForm, ChangeEmailForm, ChangePhoneForm
 from .models import Customer, Address, Card, Coupon
 from . import db
 from flask_login import login_user, login_required, logout_user, current_user
 from .validators import validate_signup_data
+from .mail import mailer
+from .ratelimit import rate_limited
+from .hashing import password_hasher
+from .usercache import invalidate_user
 from sqlalchemy import or_
 
 
@@ -66,6 +65,7 @@ def sign_up():
 
 
 @auth.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', identifier=lambda: request.form.get('identifier'))
 def login():
     form = LoginForm()
     if form.validate_on_submit():
@@ -80,7 +80,13 @@ def login():
                 if customer.is_banned:
                     flash('Hesabınız erişime kapatılmıştır. Yönetici ile iletişime geçin.', category='error')
                     return render_template('login_template/login.html', form=form)
-                
+
+                # Eski parametrelerle saklanan özeti şimdiki ayarlarla yeniliyoruz
+                if password_hasher.needs_rehash(customer.password_hash):
+                    customer.password = password
+                    db.session.commit()
+                    invalidate_user(customer.id)
+
                 login_user(customer)
                 if customer.id == 1:
                     return redirect('/admin-page')
@@ -121,6 +127,7 @@ def change_password():
             if new_password == confirm_new_password:
                 current_user.password = confirm_new_password
                 db.session.commit()
+                invalidate_user(current_user.id)
                 flash('Parola Başarıyla Güncellendi')
                 return redirect(f'/profile/{current_user.id}')
             else:
@@ -147,6 +154,7 @@ def change_email():
             else:
                 current_user.email = new_email
                 db.session.commit()
+                invalidate_user(current_user.id)
                 flash('E-posta adresiniz güncellendi.')
                 return redirect(f'/profile/{current_user.id}')
         else:
@@ -170,6 +178,7 @@ def change_phone():
             else:
                 current_user.phone = new_phone
                 db.session.commit()
+                invalidate_user(current_user.id)
                 flash('Telefon numaranız güncellendi.')
                 return redirect(f'/profile/{current_user.id}')
         else:
@@ -275,6 +284,7 @@ def delete_card(id):
 
 
 @auth.route('/forgot-password', methods=['GET', 'POST'])
+@rate_limited('forgot_password', identifier=lambda: request.form.get('email'))
 def forgot_password():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -286,44 +296,12 @@ def forgot_password():
             session['reset_code'] = code
             session['reset_email'] = email
             
-            # Send Email (Brevo)
-            url = "https://api.brevo.com/v3/smtp/email"
-            api_key = os.getenv('BREVO_API_KEY')
-            sender_email = os.getenv('BREVO_SENDER_EMAIL')
-            sender_name = os.getenv('BREVO_SENDER_NAME')
-            
-            payload = {
-                "sender": {
-                    "name": sender_name,
-                    "email": sender_email
-                },
-                "to": [
-                    {
-                        "email": email,
-                        "name": f"{customer.first_name} {customer.last_name}"
-                    }
-                ],
-                "subject": "Şifre Sıfırlama Kodu",
-                "htmlContent": f"<html><body><h1>Şifre Sıfırlama Kodunuz: {code}</h1><p>Bu kodu kullanarak şifrenizi sıfırlayabilirsiniz.</p></body></html>"
-            }
-            
-            headers = {
-                "accept": "application/json",
-                "api-key": api_key,
-                "content-type": "application/json"
-            }
-            
-            try:
-                response = requests.post(url, json=payload, headers=headers)
-                if response.status_code == 201:
-                    flash('Doğrulama kodu e-posta adresinize gönderildi.', category='success')
-                    return redirect(url_for('auth.verify_reset_code'))
-                else:
-                    print(f"Brevo Error: {response.text}")
-                    flash('E-posta gönderilemedi. Lütfen tekrar deneyin.', category='error')
-            except Exception as e:
-                print(f"Error: {e}")
-                flash('Sistem hatası oluştu.', category='error')
+            # E-posta kuyruğa yazılır, gönderimi arka plan işçisi yapar
+            mailer.send(to_email=email, to_name=f"{customer.first_name} {customer.last_name}",
+                        subject="Şifre Sıfırlama Kodu",
+                        html=f"<html><body><h1>Şifre Sıfırlama Kodunuz: {code}</h1><p>Bu kodu kullanarak şifrenizi sıfırlayabilirsiniz.</p></body></html>")
+            flash('Doğrulama kodu e-posta adresinize gönderildi.', category='success')
+            return redirect(url_for('auth.verify_reset_code'))
         else:
             flash('Bu e-posta adresi ile kayıtlı kullanıcı bulunamadı.', category='error')
             
@@ -331,6 +309,7 @@ def forgot_password():
 
 
 @auth.route('/verify-reset-code', methods=['GET', 'POST'])
+@rate_limited('verify_reset_code', identifier=lambda: session.get('reset_email'))
 def verify_reset_code():
     if 'reset_email' not in session:
         return redirect(url_for('auth.forgot_password'))
@@ -362,6 +341,7 @@ def reset_new_password():
             if customer:
                 customer.password = password
                 db.session.commit()
+                invalidate_user(customer.id)
                 
                 # Clear session
                 session.pop('reset_email', None)
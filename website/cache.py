@@ -0,0 +1,174 @@
+# ürün önbelleği: sık tekrarlanan Product.query.get çağrıları için süreç içi LRU
+import threading
+from collections import OrderedDict
+
+from flask import g, has_request_context
+from sqlalchemy import inspect as sa_inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from .models import Product, CatalogVersion
+from . import db
+
+
+CATALOG_VERSION_ID = 1
+# Ayrı sayaç: yalnızca ürün adı/kategorisi/aktifliği değişince artar, arama ve öneri indeksleri buna bakar
+INDEX_VERSION_ID = 2
+
+# Her siparişte değişen sütunlar önbelleğe girmez; erişildiğinde o ürün için veritabanından okunur.
+# Böylece ödeme ve iade yolları katalog sürümünü artırmak zorunda kalmaz
+LIVE_COLUMNS = ('in_stock',)
+
+
+def _read_version(row_id, key):
+    if has_request_context() and key in g:
+        return g.get(key)
+    version = db.session.query(CatalogVersion.version).filter_by(id=row_id).scalar() or 0
+    if has_request_context():
+        setattr(g, key, version)
+    return version
+
+
+def catalog_version():
+    """Returns the catalog version, reading it at most once per request."""
+    return _read_version(CATALOG_VERSION_ID, 'catalog_version')
+
+
+def index_version():
+    """Returns the version of the searchable product fields (name, category, active)."""
+    return _read_version(INDEX_VERSION_ID, 'index_version')
+
+
+def _bump(row_id):
+    result = db.session.execute(update(CatalogVersion)
+                                .where(CatalogVersion.id == row_id)
+                                .values(version=CatalogVersion.version + 1))
+    if result.rowcount == 0:
+        db.session.add(CatalogVersion(id=row_id, version=1))
+
+
+def bump_catalog_version(reindex=False):
+    """Increments the shared catalog version after an admin write.
+
+    Every worker compares its cached version with this counter, so a bump
+    drops stale product data in all processes, not just the current one.
+    ``reindex=True`` also bumps the index version, which makes the other
+    workers refresh their search and suggestion indexes, and returns the
+    new index version so this worker can apply the change in place.
+    """
+    new_index_version = None
+    _bump(CATALOG_VERSION_ID)
+    try:
+        if reindex:
+            _bump(INDEX_VERSION_ID)
+            db.session.flush()
+            # Satır bu işlemde kilitli: okunan değer tam olarak bizim artırdığımız sürüm
+            new_index_version = db.session.query(CatalogVersion.version).filter_by(id=INDEX_VERSION_ID).scalar()
+        db.session.commit()
+    except IntegrityError:
+        # Başka bir worker satırı aynı anda oluşturdu
+        db.session.rollback()
+        return bump_catalog_version(reindex)
+    if has_request_context():
+        g.pop('catalog_version', None)
+        g.pop('index_version', None)
+    product_cache.clear()
+    return new_index_version
+
+
+class ProductCache:
+    """Read-through LRU cache of product rows keyed by id.
+
+    Rows are kept as plain column dicts and re-attached to the current
+    session without SQL, so callers get a normal Product instance.
+    LIVE_COLUMNS are left out and load from the database on first access.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._rows = OrderedDict()
+        self._version = None
+        self._columns = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.setdefault('PRODUCT_CACHE_SIZE', 1024)
+
+    def _check_version(self):
+        version = catalog_version()
+        with self._lock:
+            if version != self._version:
+                if self._rows:
+                    self.invalidations += 1
+                self._rows.clear()
+                self._version = version
+
+    def _snapshot(self, product):
+        if self._columns is None:
+            self._columns = [attr.key for attr in sa_inspect(Product).column_attrs if attr.key not in LIVE_COLUMNS]
+        return {key: getattr(product, key) for key in self._columns}
+
+    @staticmethod
+    def _hydrate(row):
+        existing = db.session.identity_map.get(identity_key(Product, row['id']))
+        if existing is not None:
+            return existing
+        product = Product(**row)
+        make_transient_to_detached(product)
+        return db.session.merge(product, load=False)
+
+    def get(self, product_id):
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return None
+
+        self._check_version()
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is not None:
+                self._rows.move_to_end(product_id)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is not None:
+            return self._hydrate(row)
+
+        product = db.session.get(Product, product_id)
+        # Oturumda değiştirilmiş (henüz yazılmamış) bir nesneyi önbelleğe almıyoruz
+        if product is not None and not sa_inspect(product).modified:
+            row = self._snapshot(product)
+            with self._lock:
+                self._rows[product_id] = row
+                self._rows.move_to_end(product_id)
+                while len(self._rows) > self.maxsize:
+                    self._rows.popitem(last=False)
+                    self.evictions += 1
+        return product
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._rows),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'catalog_version': self._version,
+            }
+
+
+product_cache = ProductCache()
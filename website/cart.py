@@ -0,0 +1,78 @@
+# sepet değişiklikleri: atomik adet güncellemesi ve tek sorguda sepet toplamı
+from sqlalchemy import case, delete, update
+
+from .models import Cart, Product
+from . import db
+
+
+SHIPPING_COST = 200
+MAX_OP_COUNT = 50   # tek işlemde en fazla kaç tık birleştirilir
+MAX_OPS = 100       # tek istekteki en fazla işlem
+
+
+class CartOpError(ValueError):
+    pass
+
+
+def _parse_ops(ops):
+    if not isinstance(ops, list) or not ops:
+        raise CartOpError('İşlem listesi boş.')
+    if len(ops) > MAX_OPS:
+        raise CartOpError('Çok fazla işlem.')
+    parsed = []
+    for op in ops:
+        try:
+            cart_id = int(op['cart_id'])
+            kind = op['op']
+            count = int(op.get('count', 1))
+        except (KeyError, TypeError, ValueError):
+            raise CartOpError('Geçersiz işlem.')
+        if kind not in ('plus', 'minus', 'remove'):
+            raise CartOpError(f'Bilinmeyen işlem: {kind}')
+        parsed.append((cart_id, kind, min(max(count, 1), MAX_OP_COUNT)))
+    return parsed
+
+
+def cart_summary(customer_id):
+    """Returns ({cart_id: quantity}, amount) from one joined query."""
+    rows = db.session.query(Cart.id, Cart.quantity, Product.current_price)\
+        .join(Product, Cart.product_link == Product.id)\
+        .filter(Cart.customer_link == customer_id)\
+        .all()
+    lines = {cart_id: quantity for cart_id, quantity, _ in rows}
+    amount = sum(quantity * price for _, quantity, price in rows)
+    return lines, amount
+
+
+def apply_cart_ops(customer_id, ops):
+    """Applies a batch of cart operations in one transaction.
+
+    ``ops`` is a list of ``{'cart_id': .., 'op': 'plus'|'minus'|'remove',
+    'count': n}``. Quantities change with ``quantity = quantity ± n`` in SQL,
+    so concurrent clicks never overwrite each other, and rows of other
+    customers are never touched. Returns the refreshed lines and totals.
+    """
+    removed = []
+    for cart_id, kind, count in _parse_ops(ops):
+        owned = (Cart.id == cart_id) & (Cart.customer_link == customer_id)
+        if kind == 'remove':
+            db.session.execute(delete(Cart).where(owned).execution_options(synchronize_session=False))
+            removed.append(cart_id)
+        elif kind == 'plus':
+            db.session.execute(update(Cart).where(owned)
+                               .values(quantity=Cart.quantity + count)
+                               .execution_options(synchronize_session=False))
+        else:
+            # Adet 1'in altına inmez
+            db.session.execute(update(Cart).where(owned)
+                               .values(quantity=case((Cart.quantity - count < 1, 1), else_=Cart.quantity - count))
+                               .execution_options(synchronize_session=False))
+    db.session.commit()
+
+    lines, amount = cart_summary(customer_id)
+    return {
+        'lines': {str(cart_id): quantity for cart_id, quantity in lines.items()},
+        'removed': removed,
+        'amount': amount,
+        'total': amount + SHIPPING_COST,
+    }
@@ -0,0 +1,107 @@
+# sipariş oluşturma: stok düşümü, sipariş satırları ve sepet temizliği tek işlemde
+from datetime import datetime
+
+from sqlalchemy import case, delete, insert, select, update
+
+from .counters import record_orders
+from .models import Cart, Order, Product
+from . import db
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCartError(CheckoutError):
+    def __init__(self):
+        super().__init__('Sepetiniz boş.')
+
+
+class CartChangedError(CheckoutError):
+    def __init__(self):
+        super().__init__('Sepetiniz az önce değişti, lütfen tekrar deneyin.')
+
+
+class UnavailableProductError(CheckoutError):
+    def __init__(self, names):
+        self.names = names
+        super().__init__(', '.join(f"'{name}'" for name in names) + ' şu anda temin edilemiyor. Lütfen sepetinizden çıkarın.')
+
+
+class OutOfStockError(CheckoutError):
+    """Raised when some lines exceed the remaining stock; nothing is written.
+
+    ``items`` holds (product_name, requested, available) for every short line.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        details = ', '.join(f"'{name}' (istenen {requested}, kalan {available})"
+                            for name, requested, available in items)
+        super().__init__(f'Yetersiz stok: {details}' if items else 'Stok az önce değişti, lütfen tekrar deneyin.')
+
+
+def _cart_lines(customer_id):
+    return db.session.execute(
+        select(Cart.id, Cart.product_link, Cart.quantity,
+               Product.product_name, Product.current_price, Product.is_active)
+        .join(Product, Cart.product_link == Product.id)
+        .where(Cart.customer_link == customer_id)
+    ).all()
+
+
+def checkout_cart(customer_id, payment_id, status):
+    """Turns the customer's cart into orders in one transaction.
+
+    The cart rows are deleted first: if another checkout of the same cart
+    got there before us, fewer rows are deleted and CartChangedError is
+    raised, so a double submit cannot take the stock twice. Stock for
+    every product is then decremented by a single UPDATE guarded by
+    ``in_stock >= quantity``; if it does not match every product, the
+    transaction is rolled back and OutOfStockError names the short items.
+    Returns the number of order lines and the order total.
+    """
+    lines = _cart_lines(customer_id)
+    if not lines:
+        raise EmptyCartError()
+
+    inactive = [line.product_name for line in lines if not line.is_active]
+    if inactive:
+        raise UnavailableProductError(inactive)
+
+    wanted = {}
+    names = {}
+    for line in lines:
+        wanted[line.product_link] = wanted.get(line.product_link, 0) + line.quantity
+        names[line.product_link] = line.product_name
+
+    # Satırları ilk silen işlem kazanır; eşzamanlı ikinci ödeme kilit bekler, sonra 0 satır siler
+    deleted = db.session.execute(delete(Cart).where(Cart.id.in_([line.id for line in lines]))
+                                 .execution_options(synchronize_session=False))
+    if deleted.rowcount != len(lines):
+        db.session.rollback()
+        raise CartChangedError()
+
+    quantity = case(wanted, value=Product.id)
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(wanted), Product.in_stock >= quantity)
+        .values(in_stock=Product.in_stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(wanted):
+        db.session.rollback()
+        stock = dict(db.session.execute(select(Product.id, Product.in_stock).where(Product.id.in_(wanted))).all())
+        short = [(names[product_id], requested, stock.get(product_id) or 0)
+                 for product_id, requested in wanted.items() if (stock.get(product_id) or 0) < requested]
+        raise OutOfStockError(short)
+
+    now = datetime.utcnow()
+    db.session.execute(insert(Order), [
+        dict(quantity=line.quantity, price=line.current_price, status=status, payment_id=payment_id,
+             date_created=now, customer_link=customer_id, product_link=line.product_link)
+        for line in lines
+    ])
+    record_orders(status, len(lines))
+    db.session.commit()
+    return len(lines), sum(line.quantity * line.current_price for line in lines)
@@ -0,0 +1,81 @@
+# sipariş durum sayaçları: admin rozeti için COUNT(*) yerine durum başına tutulan toplam
+import click
+from flask import g, has_request_context
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .models import Order, OrderStatusCount
+from . import db
+
+
+PENDING_APPROVAL_STATUS = 'Onaylanmayı Bekliyor'
+
+
+def add_to_counter(key_column, key, total_column, delta):
+    """Adds ``delta`` to the counter row whose ``key_column`` is ``key``, creating it if missing.
+
+    One UPDATE in the common case; a missing row is inserted with
+    ``max(delta, 0)``. Runs in the caller's transaction; the caller commits.
+    """
+    model = key_column.class_
+    result = db.session.execute(update(model)
+                                .where(key_column == key)
+                                .values({total_column: total_column + delta})
+                                .execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        try:
+            # Savepoint: aynı anda başka bir istek satırı oluşturduysa dış işlem geri alınmasın
+            with db.session.begin_nested():
+                db.session.execute(insert(model).values({key_column: key, total_column: max(delta, 0)}))
+        except IntegrityError:
+            add_to_counter(key_column, key, total_column, delta)
+
+
+def record_orders(status, count=1):
+    """Adds ``count`` orders (negative to remove) to the status counter.
+    Runs in the caller's transaction; the caller commits."""
+    if not count:
+        return
+    add_to_counter(OrderStatusCount.status, status, OrderStatusCount.total, count)
+    if has_request_context():
+        g.pop('order_counts', None)
+
+
+def move_orders(old_status, new_status, count=1):
+    """Moves ``count`` orders from one status counter to another."""
+    if old_status == new_status or not count:
+        return
+    record_orders(old_status, -count)
+    record_orders(new_status, count)
+
+
+def order_count(status):
+    """Returns the number of orders in ``status``, reading it at most once per request."""
+    counts = g.setdefault('order_counts', {}) if has_request_context() else {}
+    if status not in counts:
+        counts[status] = db.session.query(OrderStatusCount.total).filter_by(status=status).scalar() or 0
+    return counts[status]
+
+
+def pending_orders_count():
+    return order_count(PENDING_APPROVAL_STATUS)
+
+
+def rebuild_order_counters():
+    """Recomputes every status counter from the order table in one transaction."""
+    db.session.query(OrderStatusCount).delete()
+    counts = select(Order.status, func.count()).group_by(Order.status)
+    db.session.execute(insert(OrderStatusCount).from_select(['status', 'total'], counts))
+    db.session.commit()
+    if has_request_context():
+        g.pop('order_counts', None)
+    return dict(db.session.query(OrderStatusCount.status, OrderStatusCount.total).all())
+
+
+@click.command('rebuild-order-counters')
+@with_appcontext
+def rebuild_order_counters_command():
+    """Rebuild the per-status order counters from the order table."""
+    for status, total in rebuild_order_counters().items():
+        click.echo(f'{status}: {total}')
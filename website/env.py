@@ -0,0 +1,25 @@
+# ortam değişkenleri: .env dosyası açılışta değil, bir gizli anahtar ilk kez okunduğunda yüklenir
+import os
+import threading
+
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Reads the .env file once; variables already set in the environment win."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _loaded = True
+
+
+def getenv(name, default=None):
+    load_env()
+    return os.getenv(name, default)
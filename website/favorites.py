@@ -0,0 +1,151 @@
+# favoriler: kullanıcı başına sıralı kimlik dizisi, toplu ekleme/çıkarma tek INSERT ve tek DELETE ile;
+# favori önbelleği (FAVORITES_CACHE_TTL) yalnızca paylaşılan depoda (Redis) varsayılan açık
+from array import array
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import delete, insert, literal, select
+
+from .kvstore import kv_store
+from .models import Favorite, Product
+from . import db
+
+
+DEFAULT_TTL = 60
+MAX_IDS = 200   # tek istekte en fazla ürün kimliği
+
+
+class FavoriteError(ValueError):
+    pass
+
+
+class FavoriteSet:
+    """A customer's favorite product ids as a sorted unsigned int array.
+
+    Four bytes per id instead of a Python int per entry; ``id in set``
+    is a binary search, so grid templates can check every card cheaply.
+    """
+
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids=()):
+        self._ids = array('I', sorted(set(ids)))
+
+    def __contains__(self, product_id):
+        i = bisect_left(self._ids, product_id)
+        return i < len(self._ids) and self._ids[i] == product_id
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def tolist(self):
+        return self._ids.tolist()
+
+
+def _key(customer_id):
+    return f'favorites:{customer_id}'
+
+
+def _load_ids(customer_id):
+    return [product_id for (product_id,) in db.session.query(Favorite.product_link)
+            .filter_by(customer_link=customer_id)]
+
+
+def favorite_ids(customer_id):
+    """Returns the customer's favorites as a FavoriteSet.
+
+    Looked up at most once per request, and served from the key/value
+    store for FAVORITES_CACHE_TTL seconds between changes.
+    """
+    memo = g.setdefault('favorite_ids', {}) if has_request_context() else {}
+    if customer_id in memo:
+        return memo[customer_id]
+
+    ttl = current_app.config['FAVORITES_CACHE_TTL']
+    ids = kv_store().get(_key(customer_id)) if ttl else None
+    if ids is None:
+        ids = _load_ids(customer_id)
+        if ttl:
+            kv_store().set(_key(customer_id), sorted(ids), ttl=ttl)
+    memo[customer_id] = FavoriteSet(ids)
+    return memo[customer_id]
+
+
+def invalidate_favorites(customer_id):
+    """Drops the cached ids; call after committing a favorite change.
+
+    Like the identity cache, this only reaches other workers through a
+    shared store.
+    """
+    kv_store().delete(_key(customer_id))
+    if has_request_context():
+        g.get('favorite_ids', {}).pop(customer_id, None)
+
+
+def _parse_ids(value):
+    if value is None:
+        return set()
+    if not isinstance(value, list):
+        raise FavoriteError('Ürün listesi bekleniyor.')
+    if len(value) > MAX_IDS:
+        raise FavoriteError('Çok fazla ürün.')
+    try:
+        return {int(product_id) for product_id in value}
+    except (TypeError, ValueError):
+        raise FavoriteError('Geçersiz ürün kimliği.')
+
+
+def _insert_favorites(customer_id, product_ids):
+    # Benzersiz (customer_link, product_link) indeksi sayesinde aynı anda gelen
+    # tekrarlar sessizce atlanır; var olmayan ürünler SELECT ile elenir
+    statement = insert(Favorite)\
+        .from_select(['customer_link', 'product_link'],
+                     select(literal(customer_id), Product.id).where(Product.id.in_(product_ids)))\
+        .prefix_with('IGNORE', dialect='mysql')\
+        .prefix_with('OR IGNORE', dialect='sqlite')
+    db.session.execute(statement)
+
+
+def apply_favorite_changes(customer_id, add=None, remove=None, toggle=None, replace=None):
+    """Applies a batch of favorite changes in one transaction.
+
+    ``add``/``remove``/``toggle`` are lists of product ids; ``replace``
+    syncs the whole set to the given list. All additions go in one
+    INSERT and all removals in one DELETE; unknown product ids are
+    skipped. Returns the ids added, the ids removed and the resulting
+    FavoriteSet.
+    """
+    add, remove, toggle = _parse_ids(add), _parse_ids(remove), _parse_ids(toggle)
+    if replace is not None:
+        wanted = _parse_ids(replace)
+        current = set(_load_ids(customer_id))
+        add, remove = wanted - current, current - wanted
+    elif toggle:
+        present = {product_id for (product_id,) in db.session.execute(
+            select(Favorite.product_link)
+            .where(Favorite.customer_link == customer_id, Favorite.product_link.in_(toggle)))}
+        add |= toggle - present
+        remove |= present
+    add -= remove
+
+    if add:
+        _insert_favorites(customer_id, add)
+    if remove:
+        db.session.execute(delete(Favorite)
+                           .where(Favorite.customer_link == customer_id, Favorite.product_link.in_(remove))
+                           .execution_options(synchronize_session=False))
+    if add or remove:
+        db.session.commit()
+        invalidate_favorites(customer_id)
+    favorites = favorite_ids(customer_id)
+    return [i for i in sorted(add) if i in favorites], [i for i in sorted(remove) if i not in favorites], favorites
+
+
+def init_app(app):
+    # saniye, 0: önbellek kapalı. Süreç içi depoda diğer worker'lar eski kalpleri gösterirdi,
+    # bu yüzden varsayılan olarak yalnızca paylaşılan depoda açık
+    shared = app.extensions['kvstore'].shared
+    app.config.setdefault('FAVORITES_CACHE_TTL', DEFAULT_TTL if shared else 0)
@@ -29,17 +29,20 @@ class PasswordChangeForm(FlaskForm):
     change_password = SubmitField('Şifreyi Değiştir')
 
 
+CATEGORY_CHOICES = [
+    ('home_living', 'Ev & Yaşam'),
+    ('fashion', 'Moda & Giyim'),
+    ('electronics', 'Elektronik'),
+    ('gaming', 'Oyun & Hobi'),
+    ('accessories', 'Saat & Aksesuar'),
+    ('beauty', 'Kozmetik & Kişisel Bakım'),
+    ('sports_outdoor', 'Spor & Outdoor')
+]
+
+
 class ShopItemsForm(FlaskForm):
     product_name = StringField('Name of Product', validators=[DataRequired()])
-    category = SelectField('Category', choices=[
-        ('home_living', 'Ev & Yaşam'),
-        ('fashion', 'Moda & Giyim'),
-        ('electronics', 'Elektronik'),
-        ('gaming', 'Oyun & Hobi'),
-        ('accessories', 'Saat & Aksesuar'),
-        ('beauty', 'Kozmetik & Kişisel Bakım'),
-        ('sports_outdoor', 'Spor & Outdoor')
-    ], validators=[DataRequired()])
+    category = SelectField('Category', choices=CATEGORY_CHOICES, validators=[DataRequired()])
     current_price = FloatField('Current Price', validators=[DataRequired()])
     previous_price = FloatField('Previous Price', validators=[Optional()])
     in_stock = IntegerField('In Stock', validators=[DataRequired(), NumberRange(min=0)])
@@ -49,14 +52,18 @@ class ShopItemsForm(FlaskForm):
     update_product = SubmitField('Güncelle')
 
 
+ORDER_STATUS_CHOICES = [
+    ('Ödeme Bekleniyor', 'Ödeme Bekleniyor'),
+    ('Onaylanmayı Bekliyor', 'Onaylanmayı Bekliyor'),
+    ('Onaylandı', 'Onaylandı'),
+    ('Kargoya Verildi', 'Kargoya Verildi'),
+    ('Teslim Edildi', 'Teslim Edildi'),
+    ('İptal Edildi', 'İptal Edildi')
+]
+
+
 class OrderForm(FlaskForm):
-    order_status = SelectField('Order Status', choices=[
-        ('Onaylanmayı Bekliyor', 'Onaylanmayı Bekliyor'),
-        ('Onaylandı', 'Onaylandı'),
-        ('Kargoya Verildi', 'Kargoya Verildi'),
-        ('Teslim Edildi', 'Teslim Edildi'),
-        ('İptal Edildi', 'İptal Edildi')
-    ])
+    order_status = SelectField('Order Status', choices=ORDER_STATUS_CHOICES)
 
     update = SubmitField('Update Status')
 
@@ -0,0 +1,148 @@
+# şablon parça önbelleği: ürün ızgarası HTML'i katalog sürümüne bağlı olarak saklanır,
+# kullanıcıya özel kısımlar (favori kalpleri) her istekte yerine konur
+import re
+import threading
+from collections import OrderedDict
+
+from flask import has_request_context
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import catalog_version
+from .favorites import favorite_ids
+
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+FAVORITE_MARKER = '<!--fav:{}-->'
+FAVORITE_PATTERN = re.compile(r'<!--fav:(\d+)-->')
+FAVORITE_ON = '<i class="fa-solid fa-heart text-danger fa-lg"></i>'
+FAVORITE_OFF = '<i class="fa-regular fa-heart text-muted fa-lg"></i>'
+
+
+class FragmentCache:
+    """LRU of rendered template fragments, bounded by total size in bytes.
+
+    Keys carry the catalog version, and a version change drops every
+    entry, so an admin write is visible on the next render in all workers.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        self.enabled = app.config['FRAGMENT_CACHE_ENABLED']
+        self.max_bytes = app.config['FRAGMENT_CACHE_MAX_BYTES']
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.globals['favorite_marker'] = favorite_marker
+        self.clear()
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get_or_render(self, key, render):
+        version = catalog_version()
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        html = str(render())
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return html
+        with self._lock:
+            if version != self._version:
+                return html  # render sürerken katalog değişti, eski çıktıyı saklama
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (html, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+fragment_cache = FragmentCache()
+
+
+def favorite_marker(product_id):
+    """Placeholder for the favorite heart inside a cached fragment."""
+    return Markup(FAVORITE_MARKER.format(int(product_id)))
+
+
+def fill_user_parts(html):
+    """Replaces the favorite markers with the current user's hearts."""
+    if '<!--fav:' not in html:
+        return html
+    favorites = ()
+    if has_request_context() and current_user.is_authenticated:
+        favorites = favorite_ids(current_user.id)
+    return FAVORITE_PATTERN.sub(lambda m: FAVORITE_ON if int(m.group(1)) in favorites else FAVORITE_OFF, html)
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache 'name', key, ... %}...{% endcache %}``
+
+    The body is rendered once per key and catalog version; per-user
+    markers (``favorite_marker``) inside it are filled on every render.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        if fragment_cache.enabled:
+            key = '\x1f'.join(str(part) for part in parts)
+            html = fragment_cache.get_or_render(key, caller)
+        else:
+            html = str(caller())
+        return Markup(fill_user_parts(html))
@@ -0,0 +1,109 @@
+# şifre özetleme: pahalı hesap istek iş parçacığında değil, sınırlı bir süreç havuzunda
+import os
+import threading
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'   # werkzeug varsayılanı
+DEFAULT_SALT_LENGTH = 16
+DEFAULT_WORKERS = 2   # her web worker'ında bu kadar süreç açılır; toplam = worker sayısı x bu değer
+
+# Parametresi yazılmamış yöntemlerde werkzeug'un kullandığı değerler
+METHOD_DEFAULTS = {
+    'scrypt': ('32768', '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+
+def method_params(method):
+    """Splits a werkzeug method string into a comparable tuple with defaults filled in,
+    so ``scrypt`` and ``scrypt:32768:8:1`` compare equal."""
+    name, *args = method.split(':')
+    defaults = METHOD_DEFAULTS.get(name, ())
+    args = args + list(defaults[len(args):])
+    return (name,) + tuple(int(arg) if arg.isdigit() else arg.lower() for arg in args)
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _check(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """Hashes and checks passwords on a bounded process pool.
+
+    ``PASSWORD_HASH_METHOD`` is a werkzeug method string such as
+    ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``; hashes stored with
+    other parameters are reported by ``needs_rehash``. With
+    ``PASSWORD_HASH_WORKERS = 0`` hashing runs inline on the caller thread.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=0, max_pending=None, start_method=None):
+        self.method = method
+        self.salt_length = DEFAULT_SALT_LENGTH
+        self.workers = workers
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.salt_length = app.config.setdefault('PASSWORD_HASH_SALT_LENGTH', DEFAULT_SALT_LENGTH)
+        self.workers = app.config.setdefault('PASSWORD_HASH_WORKERS', min(DEFAULT_WORKERS, os.cpu_count() or 1))
+        self.max_pending = app.config.setdefault('PASSWORD_HASH_MAX_PENDING', self.workers * 4)
+        # None: platform varsayılanı. spawn/forkserver ana modülü (main.py) alt süreçte yeniden çalıştırır
+        self.start_method = app.config.setdefault('PASSWORD_HASH_START_METHOD', None)
+
+    def _pool(self):
+        # multiprocessing ve havuz modülleri ilk özetlemede yüklenir, açılışta değil
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(self.start_method))
+                self._slots = threading.BoundedSemaphore(self.max_pending or self.workers * 4)
+            return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor, slots = self._pool()
+        # Kuyruk sınırı: havuz doluysa bekleyen istekler burada sıraya girer
+        with slots:
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self.shutdown()
+                return fn(*args)
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(_check, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when ``pwhash`` was made with other parameters than the current ones."""
+        return bool(pwhash) and method_params(pwhash.split('$', 1)[0]) != method_params(self.method)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,142 @@
+# ödeme uç noktaları için idempotency anahtarları: aynı anahtarla gelen tekrar istek ilk sonucu alır
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+import click
+from flask import current_app, flash, redirect, request, session
+from flask.cli import with_appcontext
+from flask_login import current_user
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from .models import IdempotencyKey
+from . import db
+
+
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+DEFAULT_TTL = 24 * 60 * 60   # saniye
+PENDING_TTL = 60             # yarıda kalan (çöken) isteğin anahtarı bu süre sonra serbest kalır
+WAIT_TIMEOUT = 10.0          # aynı anahtarla süren isteği bekleme süresi
+POLL_INTERVAL = 0.05
+
+
+def new_idempotency_key():
+    """Fresh key for a form; rendered into a hidden ``idempotency_key`` field."""
+    return uuid.uuid4().hex
+
+
+def _client_key():
+    key = request.headers.get(HEADER) or request.form.get(FIELD) or request.args.get(FIELD)
+    if not key or len(key) > 255:
+        return None
+    scope = f'{current_user.get_id()}:{request.endpoint}:{key}'
+    return hashlib.sha256(scope.encode()).hexdigest()
+
+
+def _claim(key):
+    """Inserts a pending row; returns None if we own the key, else the existing row."""
+    now = datetime.utcnow()
+    for _ in range(2):
+        db.session.add(IdempotencyKey(key=key, state='pending', expires_at=now + timedelta(seconds=PENDING_TTL)))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+        existing = db.session.get(IdempotencyKey, key, populate_existing=True)
+        if existing is None:
+            continue
+        if existing.expires_at > now:
+            return existing
+        # Süresi dolmuş anahtar: silip yeniden dene
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key,
+                                                        IdempotencyKey.expires_at <= now))
+        db.session.commit()
+    return db.session.get(IdempotencyKey, key, populate_existing=True)
+
+
+def _wait_until_done(key):
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+    while True:
+        row = db.session.get(IdempotencyKey, key, populate_existing=True)
+        if row is None or row.state == 'done' or time.monotonic() >= deadline:
+            return row
+        db.session.rollback()  # yeni bir okuma görüntüsü için işlemi kapat
+        time.sleep(POLL_INTERVAL)
+
+
+def _replay(row):
+    for category, message in json.loads(row.flashes or '[]'):
+        flash(message, category)
+    return redirect(row.location, code=row.status_code)
+
+
+def idempotent(view):
+    """Replays the first result of a request retried with the same key.
+
+    The key comes from the ``Idempotency-Key`` header or an
+    ``idempotency_key`` form/query field and is scoped to the user and the
+    endpoint. The first request runs the view and stores its status,
+    redirect target and flashed messages; retries within the TTL get those
+    back without running the view again. A retry that arrives while the
+    first request is still running waits for it to finish.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = _client_key()
+        if key is None:
+            return view(*args, **kwargs)
+
+        existing = _claim(key)
+        if existing is not None:
+            if existing.state != 'done':
+                existing = _wait_until_done(key)
+            if existing is not None and existing.state == 'done':
+                return _replay(existing)
+            return 'İşleminiz hâlâ sürüyor, lütfen bekleyin.', 409
+
+        flashes_before = len(session.get('_flashes', []))
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            db.session.rollback()
+            db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            db.session.commit()
+            raise
+
+        response = current_app.make_response(response)
+        row = db.session.get(IdempotencyKey, key)
+        if row is None:
+            return response
+        if 300 <= response.status_code < 400:
+            row.state = 'done'
+            row.status_code = response.status_code
+            row.location = response.headers.get('Location')
+            row.flashes = json.dumps(session.get('_flashes', [])[flashes_before:])
+            row.expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+        else:
+            # Yalnızca yönlendirmeler saklanır; diğer yanıtlarda anahtarı serbest bırakıyoruz
+            db.session.delete(row)
+        db.session.commit()
+        return response
+    return wrapper
+
+
+def init_app(app):
+    app.config.setdefault('IDEMPOTENCY_TTL', DEFAULT_TTL)
+    app.config.setdefault('IDEMPOTENCY_WAIT_TIMEOUT', WAIT_TIMEOUT)
+    app.jinja_env.globals['new_idempotency_key'] = new_idempotency_key
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete expired idempotency keys."""
+    result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    click.echo(f'Silinen anahtar: {result.rowcount}')
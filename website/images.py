@@ -0,0 +1,186 @@
+# ürün görselleri: yüklemede küçük/ızgara/detay boyutları ve WebP kopyaları arka planda üretilir
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+
+from .cache import bump_catalog_version
+from .models import Product
+from . import db
+
+
+# En uzun kenar (piksel); kaynak daha küçükse büyütülmez
+VARIANTS = (('thumb', 160), ('grid', 400), ('detail', 1000))
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+log = logging.getLogger(__name__)
+
+
+def source_path(picture, root_path):
+    """Maps a stored product_picture to a file on disk, or None for outside URLs."""
+    relative = picture.lstrip('./')
+    if relative.startswith('static/'):
+        return os.path.join(root_path, relative)
+    if relative.startswith('media/'):
+        # admin.get_image '../media' klasöründen sunuyor
+        return os.path.join(root_path, '..', relative)
+    return None
+
+
+def _save(image, path, **options):
+    # Yarım yazılmış dosya sunulmasın: önce geçici dosyaya, sonra atomik yeniden adlandırma
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    image.save(tmp, **options)
+    os.replace(tmp, path)
+
+
+def build_variants(path, folder, url):
+    """Writes the resized and WebP copies of one image and returns their map.
+
+    Files are named by the hash of the original bytes, so re-running on the
+    same upload reuses them and a new upload never collides with an old one.
+    """
+    from PIL import Image, ImageOps  # Pillow yalnızca görsel işlenirken gerekli
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    os.makedirs(folder, exist_ok=True)
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        fallback = 'png' if has_alpha else 'jpg'
+
+        variants = {}
+        for name, size in VARIANTS:
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            files = {'src': f'{digest}-{name}.{fallback}', 'webp': f'{digest}-{name}.webp'}
+            if not os.path.exists(os.path.join(folder, files['src'])):
+                if has_alpha:
+                    _save(resized, os.path.join(folder, files['src']), format='PNG', optimize=True)
+                else:
+                    _save(resized, os.path.join(folder, files['src']), format='JPEG', quality=JPEG_QUALITY,
+                          optimize=True, progressive=True)
+            if not os.path.exists(os.path.join(folder, files['webp'])):
+                _save(resized, os.path.join(folder, files['webp']), format='WEBP', quality=WEBP_QUALITY, method=4)
+            variants[name] = {'w': resized.width, 'h': resized.height,
+                              'src': f'{url}/{files["src"]}', 'webp': f'{url}/{files["webp"]}'}
+    return variants
+
+
+class ImagePipeline:
+    """Generates picture variants for uploaded products on a background pool.
+
+    The upload request only saves the original and queues the product; the
+    worker writes the variants and stores their map in
+    ``Product.picture_variants``. Until then templates fall back to the
+    original. With ``IMAGE_ASYNC = False`` the work runs inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGE_ASYNC', True)
+        app.config.setdefault('IMAGE_WORKERS', 2)
+        app.config.setdefault('IMAGE_VARIANT_FOLDER', os.path.join(app.root_path, 'static', 'uploads', 'variants'))
+        app.config.setdefault('IMAGE_VARIANT_URL', '/static/uploads/variants')
+        self.app = app
+        self._executor = None
+
+    def process(self, product_id, picture, bump=True):
+        """Builds the variants of one product and records them. Returns the map or None."""
+        with self.app.app_context():
+            config = self.app.config
+            path = source_path(picture, self.app.root_path)
+            if path is None or not os.path.exists(path):
+                log.warning('Görsel bulunamadı (ürün %s): %s', product_id, picture)
+                return None
+            try:
+                variants = build_variants(path, config['IMAGE_VARIANT_FOLDER'], config['IMAGE_VARIANT_URL'])
+            except ImportError:
+                log.warning('Pillow kurulu değil, görsel varyantları üretilmedi.')
+                return None
+            except OSError as e:
+                log.warning('Görsel işlenemedi (ürün %s): %s', product_id, e)
+                return None
+
+            # Bu arada yeni bir görsel yüklendiyse eski görselin varyantları yazılmaz
+            result = db.session.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.product_picture == picture)
+                .values(picture_variants=json.dumps(variants))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if result.rowcount and bump:
+                bump_catalog_version()
+            return variants
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.app.config['IMAGE_WORKERS'],
+                                                    thread_name_prefix='images')
+            return self._executor
+
+    def submit(self, product_id, picture):
+        if not self.app.config['IMAGE_ASYNC']:
+            return self.process(product_id, picture)
+        return self._pool().submit(self.process, product_id, picture)
+
+    def drain(self):
+        """Waits for queued work; used by tests, benchmarks and shutdown."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def backfill(self, batch=50, force=False):
+        """Builds variants for existing products in id order, one batch at a time.
+
+        Returns (processed, failed). The catalog version is bumped once per
+        batch instead of once per product.
+        """
+        processed = failed = 0
+        last_id = 0
+        query = select(Product.id, Product.product_picture).order_by(Product.id).limit(batch)
+        if not force:
+            query = query.where(Product.picture_variants.is_(None))
+        with ThreadPoolExecutor(max_workers=self.app.config['IMAGE_WORKERS'],
+                                thread_name_prefix='images-backfill') as executor:
+            while True:
+                rows = db.session.execute(query.where(Product.id > last_id)).all()
+                db.session.rollback()  # okuma işlemini kapat, worker'lar kendi oturumlarında yazar
+                if not rows:
+                    return processed, failed
+                results = list(executor.map(lambda row: self.process(row.id, row.product_picture, bump=False),
+                                            rows))
+                processed += sum(1 for variants in results if variants)
+                failed += sum(1 for variants in results if not variants)
+                bump_catalog_version()
+                last_id = rows[-1].id
+
+
+image_pipeline = ImagePipeline()
+
+
+@click.command('images-backfill')
+@click.option('--batch', default=50, show_default=True)
+@click.option('--force', is_flag=True, help='Varyantı olan ürünleri de yeniden işle.')
+@with_appcontext
+def images_backfill_command(batch, force):
+    """Generate picture variants for products that do not have them yet."""
+    processed, failed = image_pipeline.backfill(batch=batch, force=force)
+    click.echo(f'İşlenen ürün: {processed}, başarısız: {failed}')
@@ -0,0 +1,133 @@
+# istek başına SQL ölçümü: sorgu sayısı, toplam süre, tekrarlanan sorgu kalıpları (N+1 tespiti)
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+N_PLUS_ONE_THRESHOLD = 5
+
+_local = threading.local()
+_IN_LIST_RE = re.compile(r'\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    # "IN (?, ?, ?)" -> "IN (...)" : aynı sorgu farklı liste uzunluklarında tek kalıp sayılır
+    return _IN_LIST_RE.sub('(...)', _SPACE_RE.sub(' ', statement).strip())
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statement shapes run at least ``threshold`` times: likely N+1 loads."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def _recorders():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recorders():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _recorders()
+    if not recorders or not conn.info.get('query_start'):
+        return
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+    for stats in recorders:
+        stats.record(statement, duration)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # Hata veren sorguda after_cursor_execute çalışmaz; başlangıç zamanı yığında kalırsa
+    # bu bağlantıdaki sonraki sorgular yanlış süre ölçer
+    conn = context.connection
+    if conn is not None and context.execution_context is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+@contextmanager
+def record_queries():
+    """Collects every statement run on this thread inside the block."""
+    stats = QueryStats()
+    _recorders().append(stats)
+    try:
+        yield stats
+    finally:
+        _recorders().remove(stats)
+
+
+@contextmanager
+def query_budget(max_queries, threshold=N_PLUS_ONE_THRESHOLD):
+    """Test helper: fails when the block runs more than ``max_queries`` statements.
+
+        with query_budget(5):
+            client.get('/cart')
+    """
+    with record_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        details = '\n'.join(f'  {n}x {shape}' for shape, n in stats.repeated(threshold)) or '  (tekrar eden kalıp yok)'
+        raise AssertionError(f'{stats.count} sorgu çalıştı, bütçe {max_queries}. Tekrar edenler:\n{details}')
+
+
+def init_app(app):
+    """Adds per-request SQL stats to responses when debugging.
+
+    Enabled with ``app.debug`` or ``SQL_INSTRUMENTATION = True``; headers:
+    X-SQL-Queries, X-SQL-Time-Ms and X-SQL-N-Plus-One (repeated shapes).
+    """
+    app.config.setdefault('SQL_INSTRUMENTATION', False)
+    app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+
+    def enabled():
+        return app.debug or app.config['SQL_INSTRUMENTATION']
+
+    @app.before_request
+    def start_query_stats():
+        if enabled():
+            g.query_stats = QueryStats()
+            _recorders().append(g.query_stats)
+
+    @app.after_request
+    def add_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        repeated = stats.repeated(threshold)
+        response.headers['X-SQL-Queries'] = str(stats.count)
+        response.headers['X-SQL-Time-Ms'] = f'{stats.duration * 1000:.2f}'
+        response.headers['X-SQL-N-Plus-One'] = str(len(repeated))
+        for shape, n in repeated:
+            app.logger.warning('Olası N+1: %s kez çalıştı: %s', n, shape[:300])
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        stats = g.pop('query_stats', None)
+        if stats is not None and stats in _recorders():
+            _recorders().remove(stats)
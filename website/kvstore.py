@@ -0,0 +1,121 @@
+# süreçler arası paylaşılan küçük anahtar/değer deposu: varsayılan süreç içi, KV_STORE_URL ile Redis
+import json
+import threading
+import time
+
+from flask import current_app
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for the shared store, with per-key TTL.
+
+    Fine for a single worker and for tests; with several workers every
+    process has its own copy, so set ``KV_STORE_URL`` to share state.
+    """
+
+    shared = False  # silmeler diğer worker'lara ulaşmaz
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = {}  # key -> (value, expires_at | None)
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _sweep(self, now):
+        if len(self._data) < self.max_entries:
+            return
+        for key in [k for k, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]:
+            del self._data[key]
+        while len(self._data) >= self.max_entries:
+            self._data.pop(next(iter(self._data)))
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            self._data[key] = (value, now + ttl if ttl else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def update(self, key, fn, ttl=None):
+        """Atomically replaces the value with ``fn(old_value_or_None)`` and returns it."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            value = fn(None if entry is None else entry[0])
+            self._sweep(now)
+            self._data[key] = (value, now + ttl if ttl else None)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisKeyValueStore:
+    """Same interface on Redis; values are stored as JSON."""
+
+    shared = True
+
+    def __init__(self, url, prefix='eticaret:'):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        raw = self._redis.get(self.prefix + key)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self.prefix + key, json.dumps(value), ex=int(ttl) + 1 if ttl else None)
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*[self.prefix + key for key in keys])
+
+    def update(self, key, fn, ttl=None):
+        name = self.prefix + key
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    raw = pipe.get(name)
+                    value = fn(None if raw is None else json.loads(raw))
+                    pipe.multi()
+                    pipe.set(name, json.dumps(value), ex=int(ttl) + 1 if ttl else None)
+                    pipe.execute()
+                    return value
+                except self._watch_error:
+                    continue
+
+    def clear(self):
+        for name in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(name)
+
+
+def init_app(app):
+    app.config.setdefault('KV_STORE_URL', None)
+    url = app.config['KV_STORE_URL']
+    app.extensions['kvstore'] = RedisKeyValueStore(url) if url else LocalKeyValueStore()
+
+
+def kv_store():
+    return current_app.extensions['kvstore']
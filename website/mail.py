@@ -0,0 +1,288 @@
+# e-posta gönderimi: istek yalnızca kuyruğa yazar, arka plan işçileri toplu ve kalıcı bağlantıyla gönderir
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, or_, select, update
+
+from .env import getenv
+from .models import EmailOutbox
+from . import db
+
+
+BREVO_URL = 'https://api.brevo.com/v3/smtp/email'
+MAX_VERSIONS = 1000   # Brevo'nun tek istekte kabul ettiği en fazla messageVersions
+LEASE = 60            # gönderilmekte olan satırın başka işçiye geçmeden önceki süresi (s)
+POLL_INTERVAL = 1.0
+
+log = logging.getLogger(__name__)
+
+
+class MailError(Exception):
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BrevoTransport:
+    """Brevo transactional API over one pooled, keep-alive HTTP session."""
+
+    def __init__(self, api_key, sender_email, sender_name, pool_size=10, timeout=10):
+        self.api_key = api_key
+        self.sender = {'name': sender_name, 'email': sender_email}
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                session.headers.update({'accept': 'application/json', 'content-type': 'application/json',
+                                        'api-key': self.api_key or ''})
+                self._session = session
+            return self._session
+
+    @staticmethod
+    def _recipient(message):
+        return [{'email': message.to_email, 'name': message.to_name or message.to_email}]
+
+    def payload(self, messages):
+        first = messages[0]
+        payload = {'sender': self.sender, 'subject': first.subject, 'htmlContent': first.html}
+        if len(messages) == 1:
+            payload['to'] = self._recipient(first)
+        else:
+            # Toplu gönderim: her alıcı kendi konusu ve içeriğiyle ayrı bir sürüm
+            payload['messageVersions'] = [
+                {'to': self._recipient(m), 'subject': m.subject, 'htmlContent': m.html} for m in messages]
+        return payload
+
+    def send_batch(self, messages):
+        import requests
+
+        try:
+            response = self.session.post(BREVO_URL, json=self.payload(messages), timeout=self.timeout)
+        except requests.RequestException as e:
+            raise MailError(str(e))
+        if response.status_code in (200, 201, 202):
+            return
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise MailError(f'Brevo {response.status_code}: {response.text[:300]}', retryable=retryable)
+
+
+class StubTransport:
+    """Offline transport for tests and benchmarks: keeps what it was asked to send."""
+
+    def __init__(self, latency=0.0, fail_times=0, reject=()):
+        self.latency = latency
+        self.fail_times = fail_times
+        self.reject = set(reject)   # bu adresleri içeren istekler kalıcı hatayla (4xx gibi) reddedilir
+        self.sent = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise MailError('Sahte geçici hata')
+            if any(m.to_email in self.reject for m in messages):
+                raise MailError('Sahte geçersiz adres', retryable=False)
+            self.sent.extend((m.to_email, m.subject, m.html) for m in messages)
+
+
+class Mailer:
+    """Outbox-backed mail delivery.
+
+    ``send`` only inserts a row into email_outbox; sender threads (or the
+    ``flask mail-worker`` process) claim due rows in batches, deliver them
+    through the transport and retry temporary failures with exponential
+    backoff.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.transport = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_TRANSPORT', 'brevo')
+        app.config.setdefault('MAIL_WORKERS', 2)          # 0: süreç içinde işçi başlatma
+        app.config.setdefault('MAIL_BATCH_SIZE', 50)
+        app.config.setdefault('MAIL_MAX_ATTEMPTS', 5)
+        app.config.setdefault('MAIL_BACKOFF', 2.0)        # ilk yeniden deneme gecikmesi (s)
+        app.config.setdefault('MAIL_STUB_LATENCY', 0.0)
+        self.app = app
+        self.transport = None
+
+    def _transport(self):
+        if self.transport is None:
+            if self.app.config['MAIL_TRANSPORT'] == 'stub':
+                self.transport = StubTransport(latency=self.app.config['MAIL_STUB_LATENCY'])
+            else:
+                self.transport = BrevoTransport(api_key=getenv('BREVO_API_KEY'),
+                                                sender_email=getenv('BREVO_SENDER_EMAIL'),
+                                                sender_name=getenv('BREVO_SENDER_NAME'))
+        return self.transport
+
+    def send(self, to_email, subject, html, to_name=None):
+        """Queues one email and wakes the senders; returns the outbox row."""
+        message = EmailOutbox(to_email=to_email, to_name=to_name, subject=subject, html=html,
+                              next_attempt_at=datetime.utcnow())
+        db.session.add(message)
+        db.session.commit()
+        self.start()
+        self._wake.set()
+        return message
+
+    def _claim(self, limit):
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = select(EmailOutbox.id)\
+            .where(EmailOutbox.status.in_(('queued', 'sending')), EmailOutbox.next_attempt_at <= now)\
+            .order_by(EmailOutbox.next_attempt_at)\
+            .limit(limit)
+        ids = [row_id for (row_id,) in db.session.execute(due)]
+        if not ids:
+            db.session.rollback()
+            return []
+        # Koşullu güncelleme: aynı satırı başka bir işçi aldıysa bizde eşleşmez
+        db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), EmailOutbox.status.in_(('queued', 'sending')),
+                   EmailOutbox.next_attempt_at <= now)
+            .values(status='sending', claimed_by=token, next_attempt_at=now + timedelta(seconds=LEASE))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return db.session.execute(select(EmailOutbox).where(EmailOutbox.claimed_by == token)).scalars().all()
+
+    def _finish(self, messages, error=None):
+        now = datetime.utcnow()
+        max_attempts = self.app.config['MAIL_MAX_ATTEMPTS']
+        for message in messages:
+            message.attempts += 1
+            message.claimed_by = None
+            if error is None:
+                message.status = 'sent'
+                message.sent_at = now
+            elif error.retryable and message.attempts < max_attempts:
+                delay = self.app.config['MAIL_BACKOFF'] * 2 ** (message.attempts - 1)
+                message.status = 'queued'
+                message.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+                message.last_error = str(error)[:500]
+            else:
+                message.status = 'failed'
+                message.last_error = str(error)[:500]
+        db.session.commit()
+
+    def process_batch(self):
+        """Claims and delivers one batch of due emails; returns how many were tried."""
+        batch_size = min(self.app.config['MAIL_BATCH_SIZE'], MAX_VERSIONS)
+        messages = self._claim(batch_size)
+        if not messages:
+            return 0
+        try:
+            self._transport().send_batch(messages)
+        except MailError as e:
+            log.warning('E-posta gönderilemedi (%s adet): %s', len(messages), e)
+            if not e.retryable and len(messages) > 1:
+                # Tek bir hatalı adres tüm toplu isteği reddedebilir; diğerlerini kalıcı hataya düşürmeyelim
+                self._send_each(messages)
+            else:
+                self._finish(messages, e)
+        else:
+            self._finish(messages)
+        return len(messages)
+
+    def _send_each(self, messages):
+        for message in messages:
+            try:
+                self._transport().send_batch([message])
+            except MailError as e:
+                self._finish([message], e)
+            else:
+                self._finish([message])
+
+    def run(self, stop=None):
+        stop = stop or self._stop
+        with self.app.app_context():
+            while not stop.is_set():
+                try:
+                    sent = self.process_batch()
+                except Exception:
+                    log.exception('E-posta işçisi hatası')
+                    db.session.rollback()
+                    sent = 0
+                if not sent:
+                    self._wake.wait(POLL_INTERVAL)
+                    self._wake.clear()
+                db.session.remove()
+
+    def start(self):
+        """Starts the in-process sender threads once (MAIL_WORKERS of them)."""
+        with self._lock:
+            if self._threads or not self.app.config['MAIL_WORKERS']:
+                return
+            self._stop.clear()
+            for i in range(self.app.config['MAIL_WORKERS']):
+                thread = threading.Thread(target=self.run, name=f'mail-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join()
+
+
+mailer = Mailer()
+
+
+@click.command('mail-worker')
+@click.option('--once', is_flag=True, help='Sıradaki e-postaları gönder ve çık.')
+@with_appcontext
+def mail_worker_command(once):
+    """Deliver queued emails (run with MAIL_WORKERS = 0 on web processes)."""
+    if once:
+        total = 0
+        while True:
+            sent = mailer.process_batch()
+            if not sent:
+                break
+            total += sent
+        click.echo(f'İşlenen e-posta: {total}')
+        return
+    mailer.run()
+
+
+@click.command('mail-purge')
+@click.option('--days', default=7, show_default=True)
+@with_appcontext
+def mail_purge_command(days):
+    """Delete sent and failed emails older than the given number of days."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = db.session.execute(delete(EmailOutbox).where(
+        or_(EmailOutbox.status == 'sent', EmailOutbox.status == 'failed'), EmailOutbox.created_at < cutoff))
+    db.session.commit()
+    click.echo(f'Silinen e-posta: {result.rowcount}')
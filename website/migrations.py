@@ -0,0 +1,227 @@
+# sürümlü şema göçleri: uygulanan revizyonlar schema_migrations tablosunda tutulur
+#   flask db-upgrade   /   python migrate_db.py [DATABASE_URL]
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, inspect, select, text
+
+from .models import Product, Cart, Order, Favorite, CatalogVersion, ProductSales, SchemaMigration, IdempotencyKey, \
+    EmailOutbox, ServerSession, OrderStatusCount
+from .payments import PENDING_PAYMENT_STATUS
+from .sales import DELIVERED_STATUS
+from . import db
+
+
+MIGRATIONS = []
+
+
+def migration(revision, description):
+    """Registers a migration step. Steps run in registration order.
+
+    MySQL commits DDL implicitly, so a step can be cut off halfway; every
+    step therefore checks the live schema first and is safe to re-run.
+    """
+    def decorator(fn):
+        MIGRATIONS.append((revision, description, fn))
+        return fn
+    return decorator
+
+
+def _has_column(conn, table, column):
+    return column in {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _has_index(conn, table, name):
+    indexes = inspect(conn).get_indexes(table)
+    if conn.dialect.name == 'mysql':
+        # MySQL'de UNIQUE kısıtlar da indeks olarak listelenir
+        indexes = indexes + inspect(conn).get_unique_constraints(table)
+    return name in {index['name'] for index in indexes}
+
+
+def _ensure_index(conn, table, name):
+    if not _has_index(conn, table.name, name):
+        index = next(index for index in table.indexes if index.name == name)
+        index.create(conn)
+
+
+def _ensure_table(conn, table):
+    table.create(conn, checkfirst=True)
+
+
+def _delete_duplicates(conn, table, keep_quantity=False):
+    # Benzersiz indeks öncesi (customer_link, product_link) tekrarlarını temizle, en küçük id kalır
+    duplicates = conn.execute(
+        select(table.c.customer_link, table.c.product_link, func.min(table.c.id),
+               func.sum(table.c.quantity) if keep_quantity else func.count())
+        .group_by(table.c.customer_link, table.c.product_link)
+        .having(func.count() > 1)
+    ).all()
+    for customer_link, product_link, keep_id, quantity in duplicates:
+        if keep_quantity:
+            conn.execute(table.update().where(table.c.id == keep_id).values(quantity=quantity))
+        conn.execute(table.delete().where(table.c.customer_link == customer_link,
+                                          table.c.product_link == product_link,
+                                          table.c.id != keep_id))
+
+
+@migration('0001_product_is_active', 'product.is_active soft delete flag')
+def _product_is_active(conn):
+    if not _has_column(conn, 'product', 'is_active'):
+        conn.execute(text("ALTER TABLE product ADD COLUMN is_active BOOLEAN DEFAULT TRUE"))
+
+
+@migration('0002_product_discount_percent', 'product.discount_percent + index + backfill')
+def _product_discount_percent(conn):
+    if not _has_column(conn, 'product', 'discount_percent'):
+        conn.execute(text("ALTER TABLE product ADD COLUMN discount_percent INTEGER NOT NULL DEFAULT 0"))
+    _ensure_index(conn, Product.__table__, 'ix_product_discount_percent')
+
+    ratio = '(previous_price - current_price) * 100 / previous_price'
+    percent = f'FLOOR({ratio})' if conn.dialect.name == 'mysql' else f'CAST({ratio} AS INTEGER)'
+    conn.execute(text(f"UPDATE product SET discount_percent = {percent} WHERE previous_price > current_price"))
+
+
+def _backfill_product_sales(conn):
+    table = ProductSales.__table__
+    conn.execute(table.delete())
+    conn.execute(table.insert().from_select(
+        ['product_link', 'total_sold'],
+        select(Order.product_link, func.sum(Order.quantity))
+        .where(Order.status == DELIVERED_STATUS)
+        .group_by(Order.product_link)))
+
+
+@migration('0003_catalog_tables', 'catalog_version and product_sales tables + sales backfill')
+def _catalog_tables(conn):
+    _ensure_table(conn, CatalogVersion.__table__)
+    _ensure_table(conn, ProductSales.__table__)
+    _backfill_product_sales(conn)
+
+
+@migration('0004_hot_path_indexes', 'cart/favorite unique pairs, order and product lookup indexes')
+def _hot_path_indexes(conn):
+    _delete_duplicates(conn, Cart.__table__, keep_quantity=True)
+    _ensure_index(conn, Cart.__table__, 'uq_cart_customer_product')
+    _delete_duplicates(conn, Favorite.__table__)
+    _ensure_index(conn, Favorite.__table__, 'uq_favorite_customer_product')
+    _ensure_index(conn, Order.__table__, 'ix_order_status')
+    _ensure_index(conn, Order.__table__, 'ix_order_customer_link')
+    _ensure_index(conn, Order.__table__, 'ix_order_payment_id')
+    _ensure_index(conn, Product.__table__, 'ix_product_category_active')
+
+
+@migration('0005_order_date_created', 'order.date_created for the admin order console date filter')
+def _order_date_created(conn):
+    if not _has_column(conn, 'order', 'date_created'):
+        # "order" ayrılmış kelime; tırnaklama lehçeye göre değişiyor
+        table = conn.dialect.identifier_preparer.quote('order')
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN date_created DATETIME"))
+    _ensure_index(conn, Order.__table__, 'ix_order_date_created')
+
+
+@migration('0006_idempotency_keys', 'idempotency_key table for payment retries')
+def _idempotency_keys(conn):
+    _ensure_table(conn, IdempotencyKey.__table__)
+
+
+@migration('0007_email_outbox', 'email_outbox queue for background mail delivery')
+def _email_outbox(conn):
+    _ensure_table(conn, EmailOutbox.__table__)
+
+
+@migration('0008_server_session', 'server_session table for server-side sessions')
+def _server_session(conn):
+    _ensure_table(conn, ServerSession.__table__)
+
+
+@migration('0009_order_status_counts', 'order_status_count table + backfill from orders')
+def _order_status_counts(conn):
+    _ensure_table(conn, OrderStatusCount.__table__)
+    table = OrderStatusCount.__table__
+    conn.execute(table.delete())
+    conn.execute(table.insert().from_select(
+        ['status', 'total'], select(Order.status, func.count()).group_by(Order.status)))
+
+
+@migration('0010_product_picture_variants', 'product.picture_variants for resized/WebP images')
+def _product_picture_variants(conn):
+    if not _has_column(conn, 'product', 'picture_variants'):
+        conn.execute(text("ALTER TABLE product ADD COLUMN picture_variants TEXT"))
+
+
+@migration('0011_product_sales_backfill', 'product_sales recount for databases migrated before the 0003 backfill')
+def _product_sales_backfill(conn):
+    _backfill_product_sales(conn)
+
+
+@migration('0012_product_date_added_keyset', 'product.date_added NOT NULL + keyset pagination indexes')
+def _product_date_added_keyset(conn):
+    # Tarihi bilinmeyen eski ürünler en eskiler olarak sıralanır
+    conn.execute(text("UPDATE product SET date_added = :epoch WHERE date_added IS NULL"),
+                 {'epoch': datetime(1970, 1, 1)})
+    if conn.dialect.name == 'mysql':
+        nullable = {c['name']: c['nullable'] for c in inspect(conn).get_columns('product')}
+        if nullable['date_added']:
+            conn.execute(text("ALTER TABLE product MODIFY date_added DATETIME NOT NULL"))
+    # SQLite sütun kısıtını değiştiremiyor; yeni satırlar modeldeki varsayılanla dolar
+    _ensure_index(conn, Product.__table__, 'ix_product_category_date_added')
+    _ensure_index(conn, Product.__table__, 'ix_product_date_added')
+
+
+@migration('0013_order_invoice_id', 'order.invoice_id for gateway invoices, payment_id keeps the local reference')
+def _order_invoice_id(conn):
+    table = conn.dialect.identifier_preparer.quote('order')
+    if not _has_column(conn, 'order', 'invoice_id'):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN invoice_id VARCHAR(100)"))
+    _ensure_index(conn, Order.__table__, 'ix_order_invoice_id')
+    # Eski push'lar fatura numarasını payment_id'ye yazıyordu; bekleyenler webhook/yoklamayla eşleşsin
+    conn.execute(text(f"UPDATE {table} SET invoice_id = payment_id "
+                      f"WHERE invoice_id IS NULL AND status = :pending AND payment_id NOT LIKE 'ORD-%'"),
+                 {'pending': PENDING_PAYMENT_STATUS})
+
+
+def applied_revisions(engine):
+    with engine.connect() as conn:
+        return {revision for (revision,) in conn.execute(select(SchemaMigration.revision))}
+
+
+def upgrade(engine=None):
+    """Applies every pending migration and returns the applied revisions."""
+    engine = engine or db.engine
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    applied = applied_revisions(engine)
+
+    done = []
+    for revision, description, step in MIGRATIONS:
+        if revision in applied:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(revision=revision, description=description,
+                                                                   applied_at=datetime.utcnow()))
+        done.append(revision)
+    return done
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def upgrade_command():
+    """Apply pending schema migrations."""
+    done = upgrade()
+    for revision in done:
+        click.echo(f'Uygulandı: {revision}')
+    if not done:
+        click.echo('Şema güncel.')
+
+
+@click.command('db-status')
+@with_appcontext
+def status_command():
+    """List schema migrations and whether they are applied."""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied = applied_revisions(db.engine)
+    for revision, description, _ in MIGRATIONS:
+        mark = 'x' if revision in applied else ' '
+        click.echo(f'[{mark}] {revision}  {description}')
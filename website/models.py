@@ -2,7 +2,8 @@
 from . import db
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import json
+from .hashing import password_hasher
 
 
 class Customer(db.Model, UserMixin):
@@ -24,10 +25,10 @@ class Customer(db.Model, UserMixin):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password=password)
+        self.password_hash = password_hasher.hash(password)
 
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password=password)
+        return password_hasher.verify(self.password_hash, password)
 
     def __str__(self):
         return '<Customer %r>' % Customer.id
@@ -40,18 +41,56 @@ class Product(db.Model):
     previous_price = db.Column(db.Float, nullable=False)
     in_stock = db.Column(db.Integer, nullable=False)
     product_picture = db.Column(db.String(1000), nullable=False)
+    picture_variants = db.Column(db.Text) # JSON: images.build_variants çıktısı, üretilene kadar NULL
     flash_sale = db.Column(db.String(100)) # Stores discount percentage text e.g. "%20 İndirim"
+    discount_percent = db.Column(db.Integer, nullable=False, default=0, index=True) # Numeric discount for sorting/filtering
     category = db.Column(db.String(100)) # Stores product category
     is_active = db.Column(db.Boolean, default=True) # Soft delete flag
-    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    date_added = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     carts = db.relationship('Cart', backref=db.backref('product', lazy=True))
     orders = db.relationship('Order', backref=db.backref('product', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_product_category_active', 'category', 'is_active'),
+        # imleçli sayfalama: en yeni ürünler önce, kategori sayfası ve admin listesi
+        db.Index('ix_product_category_date_added', 'category', 'date_added', 'id'),
+        db.Index('ix_product_date_added', 'date_added', 'id'),
+    )
+
+    def refresh_discount(self):
+        # previous_price > current_price ise indirim yüzdesini ve rozet metnini günceller
+        if self.previous_price and self.current_price < self.previous_price:
+            self.discount_percent = int((self.previous_price - self.current_price) / self.previous_price * 100)
+        else:
+            self.discount_percent = 0
+        self.flash_sale = f"%{self.discount_percent} İndirim" if self.discount_percent else None
+
+    @property
+    def variants(self):
+        # {'thumb'|'grid'|'detail': {'w', 'h', 'src', 'webp'}}, varyant yoksa boş
+        return json.loads(self.picture_variants) if self.picture_variants else {}
+
+    def picture_srcset(self, kind='src'):
+        """``srcset`` value for the 'src' (JPEG/PNG) or 'webp' variants, widest last."""
+        widths = {}
+        for variant in self.variants.values():
+            widths.setdefault(variant['w'], variant[kind])
+        return ', '.join(f'{url} {width}w' for width, url in sorted(widths.items()))
+
     def __str__(self):
         return '<Product %r>' % self.product_name
 
 
+class CatalogVersion(db.Model):
+    # Tek satır: admin her katalog değişikliğinde sürümü artırır, worker önbellekleri buna bakar
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return '<CatalogVersion %r>' % self.version
+
+
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     quantity = db.Column(db.Integer, nullable=False)
@@ -60,6 +99,9 @@ class Cart(db.Model):
     product_link = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
 
     # customer product
+    __table_args__ = (
+        db.Index('uq_cart_customer_product', 'customer_link', 'product_link', unique=True),
+    )
 
     def __str__(self):
         return '<Cart %r>' % self.id
@@ -71,16 +113,43 @@ class Order(db.Model):
     price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(100), nullable=False)
     payment_id = db.Column(db.String(1000), nullable=False)
+    invoice_id = db.Column(db.String(100)) # ödeme ağ geçidinin fatura numarası, push tamamlanana kadar NULL
+    date_created = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     customer_link = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
     product_link = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
 
     # customer
+    __table_args__ = (
+        db.Index('ix_order_status', 'status'),
+        db.Index('ix_order_customer_link', 'customer_link'),
+        # payment_id VARCHAR(1000), MySQL'de indeks anahtar sınırı için ilk 64 karakter yeterli
+        db.Index('ix_order_payment_id', 'payment_id', mysql_length=64),
+        db.Index('ix_order_invoice_id', 'invoice_id'),
+    )
 
     def __str__(self):
         return '<Order %r>' % self.id
 
 
+class ProductSales(db.Model):
+    # Teslim edilen sipariş adetlerinin ürün başına toplamı (çok satanlar listesi için)
+    product_link = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    total_sold = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+    def __str__(self):
+        return '<ProductSales %r>' % self.product_link
+
+
+class OrderStatusCount(db.Model):
+    # Durum başına sipariş sayısı; admin rozeti her sayfada COUNT(*) çalıştırmasın diye
+    status = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return '<OrderStatusCount %r>' % self.status
+
+
 class Address(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     customer_link = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
@@ -125,16 +194,69 @@ class Favorite(db.Model):
     customer_link = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
     product_link = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('uq_favorite_customer_product', 'customer_link', 'product_link', unique=True),
+    )
+
     def __str__(self):
         return '<Favorite %r>' % self.id
 
 
+class SchemaMigration(db.Model):
+    # Uygulanmış şema göçleri (website/migrations.py)
+    __tablename__ = 'schema_migrations'
+    revision = db.Column(db.String(64), primary_key=True)
+    description = db.Column(db.String(255))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __str__(self):
+        return '<SchemaMigration %r>' % self.revision
 
 
+class IdempotencyKey(db.Model):
+    # Tekrarlanan ödeme isteklerinin ilk sonucu (website/idempotency.py)
+    __tablename__ = 'idempotency_key'
+    key = db.Column(db.String(64), primary_key=True)  # sha256(müşteri, uç nokta, istemci anahtarı)
+    state = db.Column(db.String(10), nullable=False, default='pending')  # pending | done
+    status_code = db.Column(db.SmallInteger)
+    location = db.Column(db.String(255))
+    flashes = db.Column(db.Text)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
 
+    def __str__(self):
+        return '<IdempotencyKey %r>' % self.key
 
 
+class EmailOutbox(db.Model):
+    # Gönderilecek e-postalar kuyruğu (website/mail.py)
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(100), nullable=False)
+    to_name = db.Column(db.String(200))
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued | sending | sent | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),
+    )
 
+    def __str__(self):
+        return '<EmailOutbox %r>' % self.id
 
 
+class ServerSession(db.Model):
+    # Sunucu tarafı oturum verisi; çerezde yalnızca rastgele sid var (website/sessions.py)
+    __tablename__ = 'server_session'
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
 
+    def __str__(self):
+        return '<ServerSession %r>' % self.sid
@@ -0,0 +1,144 @@
+# imleç (keyset) tabanlı sayfalama: OFFSET yok, derin sayfalar da ilk sayfa kadar ucuz
+import base64
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 40
+MAX_PAGE_SIZE = 100
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value, column):
+    expected = _python_type(column)
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get('dt'), str):
+            raise ValueError('datetime bekleniyor')
+        return datetime.fromisoformat(value['dt'])
+    # Liste/sözlük gibi değerler sorguya girmeden reddedilir; bool da int sayılmasın
+    if isinstance(value, (dict, list, bool)) or value is None:
+        raise ValueError('skaler değer bekleniyor')
+    if expected is float and isinstance(value, (int, float)):
+        return float(value)
+    if expected is not None and not isinstance(value, expected):
+        raise ValueError(f'{expected.__name__} bekleniyor')
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, order_by):
+    """Returns the decoded key values, or None for a missing or malformed cursor.
+
+    Every value must be a scalar of its ``order_by`` column's type, so a
+    crafted cursor cannot reach the query with a list or an object.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(order_by):
+            return None
+        return [_decode_value(value, column) for value, (column, _) in zip(values, order_by)]
+    except (ValueError, TypeError):
+        return None
+
+
+def _keyset_filter(order_by, values):
+    # (a, b, id) > (va, vb, vid) sütun yönlerine göre OR/AND açılımı
+    clauses = []
+    for i, (column, descending) in enumerate(order_by):
+        equal = [col == values[j] for j, (col, _) in enumerate(order_by[:i])]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def page_size():
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+    return min(max(per_page, 1), MAX_PAGE_SIZE)
+
+
+class KeysetPage:
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @staticmethod
+    def _url(**cursor):
+        args = request.args.to_dict()
+        args.pop('after', None)
+        args.pop('before', None)
+        args.update(cursor)
+        # Yol parametresi (ör. /category/<name>) aynı adlı sorgu parametresine üstün gelir
+        return url_for(request.endpoint, **{**args, **(request.view_args or {})})
+
+    @property
+    def next_url(self):
+        return self._url(after=self.next_cursor) if self.next_cursor else None
+
+    @property
+    def prev_url(self):
+        return self._url(before=self.prev_cursor) if self.prev_cursor else None
+
+
+def paginate_keyset(query, order_by, per_page=None, key=None):
+    """Returns one KeysetPage of ``query`` ordered by ``order_by``.
+
+    ``order_by`` is a list of (column, descending) pairs whose last column must
+    be unique (normally the primary key) so the order is stable. The columns
+    must be NOT NULL (NULL breaks the row comparison) and should be covered by
+    an index in that order. The page position comes from the
+    ``after``/``before`` request arguments.
+    """
+    per_page = per_page or page_size()
+    key = key or (lambda item: [getattr(item, column.key) for column, _ in order_by])
+
+    after = decode_cursor(request.args.get('after'), order_by)
+    before = decode_cursor(request.args.get('before'), order_by) if after is None else None
+
+    if before is not None:
+        # Geriye doğru: sırayı ters çevirip çekiyor, sonra düzeltiyoruz
+        reverse = [(column, not descending) for column, descending in order_by]
+        query = query.filter(_keyset_filter(reverse, before))
+        ordering = reverse
+    else:
+        if after is not None:
+            query = query.filter(_keyset_filter(order_by, after))
+        ordering = order_by
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in ordering])
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+
+    if before is not None:
+        items.reverse()
+        next_cursor = encode_cursor(key(items[-1])) if items else None
+        prev_cursor = encode_cursor(key(items[0])) if items and has_more else None
+    else:
+        next_cursor = encode_cursor(key(items[-1])) if items and has_more else None
+        prev_cursor = encode_cursor(key(items[0])) if items and after is not None else None
+
+    return KeysetPage(items, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,273 @@
+# ödeme ağ geçidi: STK push isteği arka plan iş parçacıklarında, onay webhook/yoklama ile toplu
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, select, update
+
+from .counters import move_orders
+from .env import getenv
+from .models import Order, Product
+from . import db
+
+
+PENDING_PAYMENT_STATUS = 'Ödeme Bekleniyor'
+CONFIRMED_STATUS = 'Onaylanmayı Bekliyor'
+FAILED_STATUS = 'İptal Edildi'
+
+COMPLETE_STATES = {'COMPLETE'}
+FAILED_STATES = {'FAILED', 'CANCELLED'}
+
+log = logging.getLogger(__name__)
+
+
+def new_payment_reference():
+    return f'ORD-{uuid.uuid4().hex[:20]}'
+
+
+class PaymentError(Exception):
+    pass
+
+
+class IntaSendGateway:
+    def __init__(self, token, publishable_key, test=True):
+        self.token = token
+        self.publishable_key = publishable_key
+        self.test = test
+        self._service = None
+
+    @property
+    def service(self):
+        if self._service is None:
+            # intasend ağır bir bağımlılık, yalnızca ilk ödemede yükleniyor
+            from intasend import APIService
+            self._service = APIService(token=self.token, publishable_key=self.publishable_key, test=self.test)
+        return self._service
+
+    def stk_push(self, phone, email, amount, reference):
+        try:
+            response = self.service.collect.mpesa_stk_push(phone_number=phone, email=email, amount=amount,
+                                                           narrative='Purchase of goods', api_ref=reference)
+            return response['invoice']['invoice_id']
+        except Exception as e:
+            raise PaymentError(str(e)) from e
+
+    def status(self, invoice_id):
+        try:
+            return self.service.collect.status(invoice_id=invoice_id)['invoice']['state']
+        except Exception as e:
+            raise PaymentError(str(e)) from e
+
+
+class FakeGateway:
+    """In-process gateway for tests and benchmarks.
+
+    ``latency`` seconds are slept on every call; ``fail`` makes pushes raise.
+    Every push completes, so ``status`` reports COMPLETE.
+    """
+
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.pushes = 0
+
+    def stk_push(self, phone, email, amount, reference):
+        time.sleep(self.latency)
+        if self.fail:
+            raise PaymentError('Sahte ağ geçidi hatası')
+        self.pushes += 1
+        return f'FAKE-{reference}'
+
+    def status(self, invoice_id):
+        time.sleep(self.latency)
+        return 'COMPLETE'
+
+
+def confirm_payments(invoice_ids):
+    """Moves the pending orders of the given gateway invoices to confirmed in one UPDATE."""
+    if not invoice_ids:
+        return 0
+    result = db.session.execute(
+        update(Order)
+        .where(Order.invoice_id.in_(invoice_ids), Order.status == PENDING_PAYMENT_STATUS)
+        .values(status=CONFIRMED_STATUS)
+        .execution_options(synchronize_session=False)
+    )
+    move_orders(PENDING_PAYMENT_STATUS, CONFIRMED_STATUS, result.rowcount)
+    db.session.commit()
+    return result.rowcount
+
+
+def fail_payments(ids, column=Order.invoice_id):
+    """Cancels the pending orders of the given payments and returns their stock.
+
+    ``ids`` are gateway invoice ids, or local references with
+    ``column=Order.payment_id`` when the push never got an invoice.
+    """
+    if not ids:
+        return 0
+    orders = db.session.execute(
+        select(Order.id, Order.product_link, Order.quantity)
+        .where(column.in_(ids), Order.status == PENDING_PAYMENT_STATUS)
+        .with_for_update()
+    ).all()
+    if not orders:
+        db.session.rollback()
+        return 0
+
+    returned = {}
+    for _, product_id, quantity in orders:
+        returned[product_id] = returned.get(product_id, 0) + quantity
+    db.session.execute(
+        update(Order)
+        .where(Order.id.in_([order_id for order_id, _, _ in orders]))
+        .values(status=FAILED_STATUS)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(returned))
+        .values(in_stock=Product.in_stock + case(returned, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+    move_orders(PENDING_PAYMENT_STATUS, FAILED_STATUS, len(orders))
+    db.session.commit()
+    return len(orders)
+
+
+def apply_gateway_states(states):
+    """Applies {invoice_id: gateway state}; returns (confirmed, failed) order counts."""
+    complete = [invoice_id for invoice_id, state in states.items() if state in COMPLETE_STATES]
+    failed = [invoice_id for invoice_id, state in states.items() if state in FAILED_STATES]
+    return confirm_payments(complete), fail_payments(failed)
+
+
+class PaymentDispatcher:
+    """Runs gateway pushes on a small thread pool instead of the request worker.
+
+    The order rows are already written in PENDING_PAYMENT_STATUS under a local
+    reference, which stays their payment_id; after the push the gateway
+    invoice id is stored next to it, and a failed push cancels the orders
+    and restocks. With
+    ``PAYMENT_ASYNC = False`` the push runs inline (old behaviour).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.gateway = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('PAYMENT_GATEWAY', 'intasend')
+        app.config.setdefault('PAYMENT_ASYNC', True)
+        app.config.setdefault('PAYMENT_WORKERS', 8)
+        app.config.setdefault('PAYMENT_FAKE_LATENCY', 0.0)
+        # Ağ geçidi panelindeki "challenge" değeri; ayarlı değilse /payments/webhook 403 döner
+        app.config.setdefault('PAYMENT_WEBHOOK_SECRET', None)
+        # Fatura numarası bu süre içinde gelmeyen siparişler iptal edilir, stok geri döner
+        app.config.setdefault('PAYMENT_PUSH_TIMEOUT', 15 * 60)
+        self.app = app
+        self.gateway = None
+        self._executor = None
+
+    def _gateway(self):
+        if self.gateway is None:
+            config = self.app.config
+            if config['PAYMENT_GATEWAY'] == 'fake':
+                self.gateway = FakeGateway(latency=config['PAYMENT_FAKE_LATENCY'])
+            else:
+                self.gateway = IntaSendGateway(token=getenv('INTASEND_API_TOKEN'),
+                                               publishable_key=getenv('INTASEND_PUBLISHABLE_KEY'))
+        return self.gateway
+
+    def _push(self, reference, phone, email, amount):
+        with self.app.app_context():
+            try:
+                invoice_id = self._gateway().stk_push(phone, email, amount, reference)
+            except PaymentError as e:
+                log.warning('Ödeme isteği başarısız (%s): %s', reference, e)
+                fail_payments([reference], column=Order.payment_id)
+                return None
+            result = db.session.execute(
+                update(Order)
+                .where(Order.payment_id == reference, Order.status == PENDING_PAYMENT_STATUS)
+                .values(invoice_id=invoice_id)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if not result.rowcount:
+                log.warning('Fatura %s geldiğinde %s siparişleri artık beklemede değildi', invoice_id, reference)
+            return invoice_id
+
+    def submit(self, reference, phone, email, amount):
+        if not self.app.config['PAYMENT_ASYNC']:
+            return self._push(reference, phone, email, amount)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.app.config['PAYMENT_WORKERS'],
+                                                    thread_name_prefix='payment')
+            return self._executor.submit(self._push, reference, phone, email, amount)
+
+    def drain(self):
+        """Waits for queued pushes; used by tests, benchmarks and shutdown."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def expire_unsent(self, batch=100):
+        """Cancels pending orders whose push never got an invoice id within PAYMENT_PUSH_TIMEOUT.
+
+        A worker crash between checkout and the gateway answer leaves the
+        order without an invoice id; without this the stock stays reserved.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.app.config['PAYMENT_PUSH_TIMEOUT'])
+        references = [payment_id for (payment_id,) in db.session.execute(
+            select(Order.payment_id)
+            .where(Order.status == PENDING_PAYMENT_STATUS, Order.invoice_id.is_(None),
+                   Order.date_created < cutoff)
+            .distinct()
+        )]
+        failed = 0
+        for i in range(0, len(references), batch):
+            failed += fail_payments(references[i:i + batch], column=Order.payment_id)
+        return failed
+
+    def poll_pending(self, batch=100):
+        """Asks the gateway about pending payments and applies the answers in batches."""
+        failed = self.expire_unsent(batch)
+        # Faturası olmayan siparişlerin push'u henüz tamamlanmadı, süresi dolunca expire_unsent iptal eder
+        invoice_ids = [invoice_id for (invoice_id,) in db.session.execute(
+            select(Order.invoice_id)
+            .where(Order.status == PENDING_PAYMENT_STATUS, Order.invoice_id.is_not(None))
+            .distinct()
+        )]
+        confirmed = 0
+        for i in range(0, len(invoice_ids), batch):
+            states = {}
+            for invoice_id in invoice_ids[i:i + batch]:
+                try:
+                    states[invoice_id] = self._gateway().status(invoice_id)
+                except PaymentError as e:
+                    log.warning('Ödeme durumu alınamadı (%s): %s', invoice_id, e)
+            c, f = apply_gateway_states(states)
+            confirmed += c
+            failed += f
+        return confirmed, failed
+
+
+payment_dispatcher = PaymentDispatcher()
+
+
+@click.command('poll-payments')
+@with_appcontext
+def poll_payments_command():
+    """Check pending payments with the gateway and confirm or cancel them."""
+    confirmed, failed = payment_dispatcher.poll_pending()
+    click.echo(f'Onaylanan sipariş: {confirmed}, iptal edilen: {failed}')
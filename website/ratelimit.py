@@ -0,0 +1,113 @@
+# token bucket hız sınırı: pahalı şifre karşılaştırmasından önce ucuz ret
+import time
+from functools import wraps
+
+from flask import current_app, flash, jsonify, redirect, request
+
+from .kvstore import kv_store
+
+
+# ad -> (kova kapasitesi, kovanın tamamen dolma süresi sn)
+# '<ad>': IP başına ve hesap+IP başına kova. '<ad>:account': yalnızca hesap başına, daha gevşek kova;
+# başkasının e-postasıyla deneme yapan biri hesabı hemen kilitleyemez ama çok adresten kaba kuvvet de sınırlı
+DEFAULT_LIMITS = {
+    'login': (10, 60),
+    'login:account': (50, 900),
+    'forgot_password': (5, 300),
+    'forgot_password:account': (10, 900),
+    'verify_reset_code': (5, 300),
+    'verify_reset_code:account': (10, 900),
+    'send_email_code': (3, 300),
+    'send_email_code:account': (3, 300),
+}
+
+
+def _take(key, capacity, period, cost=1):
+    """Takes ``cost`` tokens from the bucket; returns (allowed, retry_after seconds)."""
+    rate = capacity / period
+    now = time.time()
+    result = {}
+
+    def refill(state):
+        tokens, updated = state if state else (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        result['allowed'] = tokens >= cost
+        if result['allowed']:
+            tokens -= cost
+        result['retry_after'] = 0 if result['allowed'] else (cost - tokens) / rate
+        return [tokens, now]
+
+    kv_store().update(f'rl:{key}', refill, ttl=period)
+    return result['allowed'], result['retry_after']
+
+
+def check_limit(name, keys):
+    """Charges every bucket of ``name`` for the given keys.
+
+    Returns 0 when the request may go on, else the seconds to wait.
+    """
+    if not current_app.config['RATE_LIMIT_ENABLED']:
+        return 0
+    capacity, period = current_app.config['RATE_LIMITS'][name]
+    retry_after = 0
+    for key in keys:
+        allowed, wait = _take(f'{name}:{key}', capacity, period)
+        if not allowed:
+            retry_after = max(retry_after, wait)
+    return retry_after
+
+
+def client_ip():
+    # Ters vekil arkasında gerçek adres, TRUSTED_PROXIES ile kurulan ProxyFix'ten gelir
+    return request.remote_addr or '-'
+
+
+def rate_limited(name, identifier=None, json=False):
+    """Rejects POSTs over the ``name`` limit before the view runs.
+
+    The ``name`` limit is charged per client IP and, when ``identifier``
+    returns a value (form field, session value, user id), per identifier
+    and IP. The looser ``name:account`` limit, when defined, is charged
+    per identifier alone, so one account cannot be brute forced from many
+    addresses, and a stranger typing someone's email cannot lock them out
+    quickly.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'POST':
+                return view(*args, **kwargs)
+
+            ip = client_ip()
+            keys = [f'ip:{ip}']
+            account = None
+            value = identifier() if identifier else None
+            if value:
+                account = f'id:{str(value).strip().lower()}'
+                keys.append(f'{account}:{ip}')
+
+            retry_after = check_limit(name, keys)
+            if account and f'{name}:account' in current_app.config['RATE_LIMITS']:
+                retry_after = max(retry_after, check_limit(f'{name}:account', [account]))
+            if not retry_after:
+                return view(*args, **kwargs)
+
+            seconds = int(retry_after) + 1
+            message = f'Çok fazla deneme yaptınız. Lütfen {seconds} saniye sonra tekrar deneyin.'
+            if json:
+                response = jsonify({'success': False, 'message': message})
+                response.status_code = 429
+            else:
+                flash(message, category='error')
+                response = redirect(request.full_path if request.query_string else request.path)
+            response.headers['Retry-After'] = str(seconds)
+            return response
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    app.config.setdefault('RATE_LIMIT_ENABLED', True)
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(app.config.get('RATE_LIMITS', {}))
+    app.config['RATE_LIMITS'] = limits
@@ -0,0 +1,54 @@
+# çok satanlar: teslim edilen siparişlerden beslenen ürün başına satış sayacı
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select
+
+from .counters import add_to_counter
+from .models import Product, Order, ProductSales
+from . import db
+
+
+DELIVERED_STATUS = 'Teslim Edildi'
+BEST_SELLER_LIMIT = 50
+
+
+def record_status_change(order, old_status, new_status):
+    """Adjusts the product's sales counter when an order enters or leaves
+    the delivered state. Runs in the caller's transaction; the caller commits."""
+    if old_status == new_status:
+        return
+    if new_status == DELIVERED_STATUS:
+        delta = order.quantity
+    elif old_status == DELIVERED_STATUS:
+        delta = -order.quantity
+    else:
+        return
+    add_to_counter(ProductSales.product_link, order.product_link, ProductSales.total_sold, delta)
+
+
+def top_sellers(limit=BEST_SELLER_LIMIT):
+    """Returns [(product, total_sold)] ordered by units delivered."""
+    return db.session.query(Product, ProductSales.total_sold)\
+        .join(ProductSales, ProductSales.product_link == Product.id)\
+        .filter(ProductSales.total_sold > 0)\
+        .order_by(ProductSales.total_sold.desc(), Product.id.desc())\
+        .limit(limit).all()
+
+
+def rebuild_sales_counters():
+    """Recomputes every counter from the order table in one transaction."""
+    db.session.query(ProductSales).delete()
+    delivered = select(Order.product_link, func.sum(Order.quantity))\
+        .where(Order.status == DELIVERED_STATUS)\
+        .group_by(Order.product_link)
+    db.session.execute(insert(ProductSales).from_select(['product_link', 'total_sold'], delivered))
+    db.session.commit()
+    return db.session.query(ProductSales).count()
+
+
+@click.command('rebuild-sales')
+@with_appcontext
+def rebuild_sales_command():
+    """Rebuild the best-seller counters from delivered orders."""
+    count = rebuild_sales_counters()
+    click.echo(f'{count} ürün için satış sayacı yeniden hesaplandı.')
@@ -0,0 +1,263 @@
+# ürün arama motoru: ürün adı ve kategorisi üzerinde bellek içi ters indeks
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+
+from .cache import index_version
+from .forms import CATEGORY_CHOICES
+from .models import Product
+from . import db
+
+
+NAME_WEIGHT = 3.0
+CATEGORY_WEIGHT = 1.0
+PREFIX_FACTOR = 0.5        # "ipho" -> "iphone" tam eşleşmenin yarı puanını alır
+MAX_PREFIX_EXPANSION = 50  # tek bir sorgu kelimesinin genişleyebileceği en fazla terim
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+INDEX_CHECK_INTERVAL = 5.0  # index_version en fazla bu kadar saniyede bir okunur
+
+log = logging.getLogger(__name__)
+
+CATEGORY_LABELS = dict(CATEGORY_CHOICES)
+
+# 'İ'.lower() Python'da 'i̇' (i + birleşik nokta) verir, 'I' ise Türkçede 'ı' olmalı.
+# İkisini de küçültmeden önce düz 'i' yapıyoruz; ı/ş/ğ/ü/ö/ç sonra ASCII'ye katlanıyor.
+_PRE_LOWER = str.maketrans({'İ': 'i', 'I': 'i'})
+_POST_FOLD = str.maketrans({'ı': 'i'})
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """Lowercases Turkish text and folds it to plain ASCII letters."""
+    if not text:
+        return ''
+    text = text.translate(_PRE_LOWER).lower()
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return text.translate(_POST_FOLD)
+
+
+def tokenize(text):
+    # '_' de \w içinde, 'home_living' gibi anahtarları ayrı kelimelere bölüyoruz
+    return _TOKEN_RE.findall(normalize_text(text).replace('_', ' '))
+
+
+class SearchResult:
+    def __init__(self, ids, total, page, per_page, terms=''):
+        self.ids = ids
+        self.terms = terms      # normalize edilmiş sorgu; parça önbelleği anahtarı
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+
+class VersionedIndex:
+    """In-memory product index kept in step with the shared index version.
+
+    The first use builds the index inline (one thread builds, the others
+    wait). Afterwards the version is read at most every
+    INDEX_CHECK_INTERVAL seconds; when another worker changed it, one
+    background thread rebuilds while requests keep using the old index.
+    The worker that made the change applies it in place through the
+    subclass's per-product methods and moves to the new version via
+    ``_advance``, so it does not rebuild at all.
+    """
+
+    check_interval = INDEX_CHECK_INTERVAL
+
+    def __init__(self):
+        self._lock = threading.Lock()        # okuma/yazma; kurulum boyunca tutulmaz
+        self._build_lock = threading.Lock()  # aynı anda tek kurulum
+        self._rebuilding = False
+        self._checked_at = 0.0
+        self.version = None                  # indeksin kurulduğu index_version, None: hiç kurulmadı
+
+    def rebuild(self, version=None):
+        raise NotImplementedError
+
+    def ensure_built(self):
+        if self.version is None:
+            with self._build_lock:
+                if self.version is None:
+                    self.rebuild(index_version())
+                    self._checked_at = time.monotonic()
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        # Sürüm kurulumdan önce okunur: kurulum sırasında gelen bir değişiklik bir sonraki kontrolde yakalanır
+        version = index_version()
+        if version == self.version:
+            return
+        with self._build_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        app = current_app._get_current_object()
+        threading.Thread(target=self._rebuild_in_background, args=(app, version),
+                         name=f'{type(self).__name__}-rebuild', daemon=True).start()
+
+    def _rebuild_in_background(self, app, version):
+        try:
+            with app.app_context():
+                with self._build_lock:
+                    self.rebuild(version)
+        except Exception:
+            log.exception('%s yeniden kurulamadı', type(self).__name__)
+        finally:
+            self._rebuilding = False
+
+    def _advance(self, version):
+        # Yerinde güncellemeden sonra: aradaki tek değişiklik bizimkiyse indeks yeni sürümle güncel
+        if version is not None and self.version == version - 1:
+            self.version = version
+
+
+class SearchIndex(VersionedIndex):
+    """Inverted index over product name and category.
+
+    Built in bulk on first use and refreshed as described in
+    VersionedIndex; admin writes in this worker go through add_product.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._postings = {}     # token -> {product_id: weight}
+        self._doc_tokens = {}   # product_id -> tokens (silme için)
+        self._vocabulary = []   # sıralı terimler, önek genişletmesi için
+
+    @staticmethod
+    def _weights(name, category):
+        weights = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        category_text = f'{category or ""} {CATEGORY_LABELS.get(category, "")}'
+        for token in set(tokenize(category_text)):
+            weights[token] = weights.get(token, 0) + CATEGORY_WEIGHT
+        return weights
+
+    def _add_locked(self, product_id, name, category):
+        self._remove_locked(product_id)
+        weights = self._weights(name, category)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            postings[product_id] = weight
+        self._doc_tokens[product_id] = tuple(weights)
+
+    def _remove_locked(self, product_id):
+        for token in self._doc_tokens.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                i = bisect.bisect_left(self._vocabulary, token)
+                if i < len(self._vocabulary) and self._vocabulary[i] == token:
+                    del self._vocabulary[i]
+
+    def rebuild(self, version=None):
+        rows = db.session.query(Product.id, Product.product_name, Product.category)\
+            .execution_options(yield_per=1000)
+        fresh = SearchIndex()
+        for product_id, name, category in rows:
+            fresh._add_locked(product_id, name, category)
+        with self._lock:
+            self._postings = fresh._postings
+            self._doc_tokens = fresh._doc_tokens
+            self._vocabulary = fresh._vocabulary
+            self.version = version
+
+    def add_product(self, product, version=None):
+        """Adds or re-indexes a product after it was created or edited;
+        ``version`` is the index version returned by bump_catalog_version."""
+        if self.version is None:
+            return
+        with self._lock:
+            self._add_locked(product.id, product.product_name, product.category)
+            self._advance(version)
+
+    def _expand(self, token):
+        # Tam eşleşme + aynı önekle başlayan terimler (yazarken arama için)
+        matches = []
+        i = bisect.bisect_left(self._vocabulary, token)
+        while i < len(self._vocabulary) and len(matches) < MAX_PREFIX_EXPANSION:
+            term = self._vocabulary[i]
+            if not term.startswith(token):
+                break
+            matches.append((term, 1.0 if term == token else PREFIX_FACTOR))
+            i += 1
+        return matches
+
+    def _score(self, query):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return {}
+        total_docs = max(len(self._doc_tokens), 1)
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, factor in self._expand(token):
+                postings = self._postings[term]
+                idf = math.log(1 + total_docs / len(postings))
+                for product_id, weight in postings.items():
+                    score = weight * idf * factor
+                    if score > token_scores.get(product_id, 0):
+                        token_scores[product_id] = score
+            # Her sorgu kelimesi eşleşmeli (AND)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {pid: s + token_scores[pid] for pid, s in scores.items() if pid in token_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def search(self, query, page=1, per_page=DEFAULT_PER_PAGE):
+        self.ensure_built()
+        page = max(page, 1)
+        per_page = min(max(per_page, 1), MAX_PER_PAGE)
+        with self._lock:
+            scores = self._score(query)
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], -pid))
+        start = (page - 1) * per_page
+        return SearchResult(ranked[start:start + per_page], len(ranked), page, per_page,
+                            terms=' '.join(tokenize(query)))
+
+
+search_index = SearchIndex()
+
+
+def search_products(query, page=1, per_page=DEFAULT_PER_PAGE):
+    """Returns (products, result) for one page of ranked search results."""
+    result = search_index.search(query, page=page, per_page=per_page)
+    if not result.ids:
+        return [], result
+    products = Product.query.filter(Product.id.in_(result.ids)).all()
+    position = {pid: i for i, pid in enumerate(result.ids)}
+    products.sort(key=lambda p: position[p.id])
+    return products, result
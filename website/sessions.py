@@ -0,0 +1,179 @@
+# sunucu tarafı oturum: çerezde yalnızca opak bir kimlik, veri SQL tablosunda ya da anahtar/değer deposunda
+import secrets
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, select, update
+from werkzeug.datastructures import CallbackDict
+
+from .kvstore import kv_store
+from .models import ServerSession
+from . import db
+
+
+serializer = TaggedJSONSerializer()  # Flask çerez oturumuyla aynı: tuple, bytes, Markup korunur
+EPOCH = datetime(1970, 1, 1)
+ASSET_PREFIX = '/assets/'  # assets.serve_asset, özetli statik dosyalar
+
+
+def _to_datetime(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def _to_timestamp(value):
+    return (value - EPOCH).total_seconds()
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, expires_at=None, static=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.static = static
+        self.new = sid is None
+        self.modified = False
+        self.user_id = self.get('_user_id')
+
+
+class SqlSessionStore:
+    """Sessions in the server_session table; expired rows are purged in batches."""
+
+    def load(self, sid):
+        with db.engine.connect() as conn:
+            row = conn.execute(select(ServerSession.data, ServerSession.expires_at)
+                               .where(ServerSession.sid == sid)).first()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return serializer.loads(row.data), _to_timestamp(row.expires_at)
+
+    def save(self, sid, data, expires_at):
+        values = dict(data=serializer.dumps(data), expires_at=_to_datetime(expires_at))
+        with db.engine.begin() as conn:
+            result = conn.execute(update(ServerSession).where(ServerSession.sid == sid).values(**values))
+            if result.rowcount == 0:
+                conn.execute(ServerSession.__table__.insert().values(sid=sid, **values))
+
+    def delete(self, sid):
+        with db.engine.begin() as conn:
+            conn.execute(delete(ServerSession).where(ServerSession.sid == sid))
+
+    def purge_expired(self, batch=1000):
+        total = 0
+        while True:
+            with db.engine.begin() as conn:
+                sids = [sid for (sid,) in conn.execute(
+                    select(ServerSession.sid).where(ServerSession.expires_at <= datetime.utcnow()).limit(batch))]
+                if not sids:
+                    return total
+                conn.execute(delete(ServerSession).where(ServerSession.sid.in_(sids)))
+            total += len(sids)
+
+
+class KeyValueSessionStore:
+    """Sessions in the key/value store (Redis or the local stand-in); it expires keys itself."""
+
+    def load(self, sid):
+        entry = kv_store().get(f'session:{sid}')
+        if entry is None:
+            return None
+        return serializer.loads(entry['data']), entry['expires_at']
+
+    def save(self, sid, data, expires_at):
+        kv_store().set(f'session:{sid}', {'data': serializer.dumps(data), 'expires_at': expires_at},
+                       ttl=max(1, expires_at - time.time()))
+
+    def delete(self, sid):
+        kv_store().delete(f'session:{sid}')
+
+    def purge_expired(self, batch=1000):
+        return 0
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data on the server behind a random session id cookie.
+
+    The store is written only when the session changed, or when less than
+    half of its lifetime is left, and never for static files. Logging in
+    (a new ``_user_id``) issues a fresh id against session fixation.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _lifetime(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def open_session(self, app, request):
+        if request.path.startswith(ASSET_PREFIX) or \
+                (app.static_url_path and request.path.startswith(app.static_url_path + '/')):
+            return ServerSideSession(static=True)
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and len(sid) <= 64:
+            loaded = self.store.load(sid)
+            if loaded is not None:
+                data, expires_at = loaded
+                return ServerSideSession(data, sid=sid, expires_at=expires_at)
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        if session.static:
+            return
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        lifetime = self._lifetime(app)
+        stale = session.expires_at is not None and session.expires_at - now < lifetime / 2
+        if not (session.modified or stale):
+            return
+
+        sid = session.sid
+        if sid is None or session.get('_user_id') != session.user_id:
+            if sid is not None:
+                self.store.delete(sid)
+            sid = secrets.token_urlsafe(32)
+        expires_at = now + lifetime
+        self.store.save(sid, dict(session), expires_at)
+
+        if sid != session.sid or stale or session.permanent:
+            response.set_cookie(name, sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
+
+
+def init_app(app):
+    # sql | kv | cookie. sql, oturum çerezi olan her istekte server_session için fazladan bir SELECT
+    # demek (değiştiyse bir de UPDATE); KV_STORE_URL ile paylaşılan bir depo varsa varsayılan kv.
+    # Yerel kv deposu süreç içi olduğundan çok worker'lı kurulumda Redis olmadan kv kullanılmamalı
+    app.config.setdefault('SESSION_BACKEND', 'kv' if app.config.get('KV_STORE_URL') else 'sql')
+    backend = app.config['SESSION_BACKEND']
+    if backend == 'sql':
+        app.session_interface = ServerSideSessionInterface(SqlSessionStore())
+    elif backend == 'kv':
+        app.session_interface = ServerSideSessionInterface(KeyValueSessionStore())
+
+
+@click.command('purge-sessions')
+@click.option('--batch', default=1000, show_default=True)
+@with_appcontext
+def purge_sessions_command(batch):
+    """Delete expired server-side sessions in batches."""
+    store = getattr(current_app.session_interface, 'store', None)
+    removed = store.purge_expired(batch) if store else 0
+    click.echo(f'Silinen oturum: {removed}')
@@ -1,76 +1,182 @@
-$('.plus-cart').click(function () {
-    console.log('Button clicked')
-
-    var id = $(this).attr('pid').toString()
-    // var quantity = this.parentNode.children[2] // This was selecting the button (index 2) resulting in overwrite!
+// Sepet: hızlı tıklamalar biriktirilip tek istekte /cart/update'e gönderilir
+var cartDeltas = {}
+var cartRemovals = []
+var cartTimer = null
+
+function renderCart(data) {
+    Object.keys(data.lines).forEach(function (id) {
+        var el = document.getElementById(`quantity${id}`)
+        if (el && !cartDeltas[id]) {
+            el.innerText = data.lines[id]
+        }
+    })
+    document.getElementById('amount_tt').innerText = data.amount
+    document.getElementById('totalamount').innerText = data.total
+}
+
+function flushCart() {
+    cartTimer = null
+    var ops = []
+    Object.keys(cartDeltas).forEach(function (id) {
+        var delta = cartDeltas[id]
+        if (delta !== 0) {
+            ops.push({ cart_id: id, op: delta > 0 ? 'plus' : 'minus', count: Math.abs(delta) })
+        }
+    })
+    cartRemovals.forEach(function (id) {
+        ops.push({ cart_id: id, op: 'remove' })
+    })
+    cartDeltas = {}
+    cartRemovals = []
+    if (ops.length === 0) {
+        return
+    }
 
     $.ajax({
-        type: 'GET',
-        url: '/pluscart',
-        data: {
-            cart_id: id
-        },
-
-        success: function (data) {
-            console.log(data)
-            // quantity.innerText = data.quantity // FIX: Don't use the wrong selector
-            document.getElementById(`quantity${id}`).innerText = data.quantity
-            document.getElementById('amount_tt').innerText = data.amount
-            document.getElementById('totalamount').innerText = data.total
-
-        }
+        type: 'POST',
+        url: '/cart/update',
+        contentType: 'application/json',
+        data: JSON.stringify({ ops: ops }),
+        success: renderCart
     })
+}
+
+function queueCart() {
+    clearTimeout(cartTimer)
+    cartTimer = setTimeout(flushCart, 250)
+}
+
+function changeQuantity(id, step) {
+    var el = document.getElementById(`quantity${id}`)
+    var shown = parseInt(el.innerText)
+    if (shown + step < 1) {
+        return // adet 1'in altına inmez
+    }
+    el.innerText = shown + step
+    cartDeltas[id] = (cartDeltas[id] || 0) + step
+    queueCart()
+}
+
+$('.plus-cart').click(function () {
+    changeQuantity($(this).attr('pid').toString(), 1)
 })
 
 
 $('.minus-cart').click(function () {
-    console.log('Button clicked')
+    changeQuantity($(this).attr('pid').toString(), -1)
+})
 
-    var id = $(this).attr('pid').toString()
-    // var quantity = this.parentNode.children[2] // Incorrect selector (Index 2 is plus button!)
 
-    var currentQuantity = parseInt(document.getElementById(`quantity${id}`).innerText);
+$('.remove-cart').click(function (e) {
+    e.preventDefault()
 
-    if (currentQuantity > 1) {
-        $.ajax({
-            type: 'GET',
-            url: '/minuscart',
-            data: {
-                cart_id: id
-            },
+    var id = $(this).attr('pid').toString()
 
-            success: function (data) {
-                console.log(data)
-                // quantity.innerText = data.quantity 
-                document.getElementById(`quantity${id}`).innerText = data.quantity
-                document.getElementById('amount_tt').innerText = data.amount
-                document.getElementById('totalamount').innerText = data.total
+    var to_remove = this.parentNode.parentNode.parentNode.parentNode
 
-            }
-        })
-    }
+    delete cartDeltas[id]
+    cartRemovals.push(id)
+    to_remove.remove()
+    clearTimeout(cartTimer)
+    flushCart()
 })
 
 
-$('.remove-cart').click(function () {
+// Favoriler: kalp tıklamaları biriktirilip tek istekte /favorites/update'e gönderilir
+var favoriteToggles = {}
+var favoriteTimer = null
 
-    var id = $(this).attr('pid').toString()
+function favoriteIcon(on) {
+    return on ? '<i class="fa-solid fa-heart text-danger fa-lg"></i>'
+              : '<i class="fa-regular fa-heart text-muted fa-lg"></i>'
+}
 
-    var to_remove = this.parentNode.parentNode.parentNode.parentNode
+function renderFavorites(favorites) {
+    $('a[href^="/toggle-favorite/"]').each(function () {
+        var id = parseInt(this.getAttribute('href').split('/').pop())
+        if (!favoriteToggles[id]) {
+            this.innerHTML = favoriteIcon(favorites.indexOf(id) !== -1)
+        }
+    })
+}
+
+function flushFavorites() {
+    favoriteTimer = null
+    // Çift sayıda tıklanan ürün değişmemiş sayılır
+    var toggle = Object.keys(favoriteToggles).map(Number)
+    favoriteToggles = {}
+    if (toggle.length === 0) {
+        return
+    }
 
     $.ajax({
-        type: 'GET',
-        url: '/removecart',
-        data: {
-            cart_id: id
-        },
-
+        type: 'POST',
+        url: '/favorites/update',
+        contentType: 'application/json',
+        data: JSON.stringify({ toggle: toggle }),
         success: function (data) {
-            document.getElementById('amount_tt').innerText = data.amount
-            document.getElementById('totalamount').innerText = data.total
-            to_remove.remove()
+            if (!data.favorites) {
+                window.location = '/login' // oturum yok, giriş sayfası döndü
+                return
+            }
+            renderFavorites(data.favorites)
         }
     })
+}
+
+$(document).on('click', 'a[href^="/toggle-favorite/"]', function (e) {
+    e.preventDefault()
+    var id = parseInt(this.getAttribute('href').split('/').pop())
+    // all.min.js <i> etiketini svg ile değiştirir, dolu kalp data-prefix="fas" olur
+    var on = $(this).find('.fa-solid, [data-prefix="fas"]').length === 0
+    this.innerHTML = favoriteIcon(on)
+
+    if (favoriteToggles[id]) {
+        delete favoriteToggles[id]
+    } else {
+        favoriteToggles[id] = true
+    }
+    clearTimeout(favoriteTimer)
+    favoriteTimer = setTimeout(flushFavorites, 250)
+})
 
 
+// Arama önerileri (yazarken)
+var suggestTimer = null
+
+$('#search-input').on('input', function () {
+    var input = this
+    var list = $('#search-suggestions')
+    clearTimeout(suggestTimer)
+
+    if (input.value.trim().length < 2) {
+        list.removeClass('show').empty()
+        return
+    }
+
+    suggestTimer = setTimeout(function () {
+        $.getJSON('/search/suggest', { q: input.value }, function (data) {
+            if (input.value !== data.query) {
+                return // daha yeni bir istek yolda
+            }
+            list.empty()
+            data.suggestions.forEach(function (item) {
+                $('<li>').append(
+                    $('<a class="dropdown-item" href="#">').text(item.name)
+                ).appendTo(list)
+            })
+            list.toggleClass('show', data.suggestions.length > 0)
+        })
+    }, 120)
+})
+
+$('#search-suggestions').on('mousedown', '.dropdown-item', function (e) {
+    e.preventDefault()
+    $('#search-input').val($(this).text())
+    $('#search-suggestions').removeClass('show')
+    $('#search-input').closest('form').submit()
+})
+
+$('#search-input').on('blur', function () {
+    $('#search-suggestions').removeClass('show')
 })
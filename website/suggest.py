@@ -0,0 +1,135 @@
+# arama kutusu için yazarken öneri: aktif ürün adlarının sıralı önek dizisi
+import bisect
+from array import array
+
+from .models import Product
+from .search import VersionedIndex, normalize_text
+from . import db
+
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_KEY_LENGTH = 32   # anahtarları kısaltıyoruz, uzun önekler tam adla doğrulanır
+MAX_SCAN = 200        # tek sorguda bakılacak en fazla anahtar
+
+
+class PrefixIndex(VersionedIndex):
+    """Sorted array of normalized product-name keys for typeahead lookups.
+
+    Every active product contributes one key per word start ("apple iphone 17",
+    "iphone 17", "17"), so a prefix matches the beginning of any word. Keys live
+    in a plain list kept sorted next to an int array of product ids, and a lookup
+    is one bisect followed by a short forward scan. Like SearchIndex it is
+    refreshed as described in VersionedIndex.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []
+        self._ids = array('l')
+        self._names = {}       # product_id -> görünen ad
+        self._normalized = {}  # product_id -> normalize edilmiş tam ad
+
+    @staticmethod
+    def _keys_for(normalized):
+        words = normalized.split()
+        return sorted({' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))})
+
+    def _insert_locked(self, product_id, name):
+        normalized = ' '.join(normalize_text(name).split())
+        if not normalized:
+            return
+        self._names[product_id] = name
+        self._normalized[product_id] = normalized
+        for key in self._keys_for(normalized):
+            i = bisect.bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._ids.insert(i, product_id)
+
+    def _delete_locked(self, product_id):
+        normalized = self._normalized.pop(product_id, None)
+        self._names.pop(product_id, None)
+        if normalized is None:
+            return
+        for key in self._keys_for(normalized):
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._ids[i] == product_id:
+                    del self._keys[i]
+                    del self._ids[i]
+                    break
+                i += 1
+
+    def load(self, rows, version=None):
+        """Bulk-builds the index from (product_id, name) pairs."""
+        pairs = []
+        names = {}
+        normalized_names = {}
+        for product_id, name in rows:
+            normalized = ' '.join(normalize_text(name).split())
+            if not normalized:
+                continue
+            names[product_id] = name
+            normalized_names[product_id] = normalized
+            pairs.extend((key, product_id) for key in self._keys_for(normalized))
+        pairs.sort()
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._ids = array('l', (product_id for _, product_id in pairs))
+            self._names = names
+            self._normalized = normalized_names
+            self.version = version
+
+    def rebuild(self, version=None):
+        rows = db.session.query(Product.id, Product.product_name)\
+            .filter(Product.is_active == True)\
+            .execution_options(yield_per=1000)
+        self.load(rows, version)
+
+    def update_product(self, product, version=None):
+        """Applies an add, rename or (de)activation of a single product;
+        ``version`` is the index version returned by bump_catalog_version."""
+        if self.version is None:
+            return
+        with self._lock:
+            self._delete_locked(product.id)
+            if product.is_active:
+                self._insert_locked(product.id, product.product_name)
+            self._advance(version)
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        prefix = ' '.join(normalize_text(prefix).split())
+        if not prefix:
+            return []
+        limit = min(max(limit, 1), MAX_LIMIT)
+        key_prefix = prefix[:MAX_KEY_LENGTH]
+        results = []
+        seen_ids = set()
+        seen_names = set()
+        with self._lock:
+            i = bisect.bisect_left(self._keys, key_prefix)
+            end = min(len(self._keys), i + MAX_SCAN)
+            while i < end and len(results) < limit:
+                key = self._keys[i]
+                if not key.startswith(key_prefix):
+                    break
+                product_id = self._ids[i]
+                i += 1
+                if product_id in seen_ids:
+                    continue
+                seen_ids.add(product_id)
+                # Anahtar kısaltılmışsa uzun öneki tam adla doğrula
+                if len(prefix) > MAX_KEY_LENGTH and (' ' + prefix) not in (' ' + self._normalized[product_id]):
+                    continue
+                name = self._names[product_id]
+                if name in seen_names:
+                    continue
+                seen_names.add(name)
+                results.append({'id': product_id, 'name': name})
+        return results
+
+    def __len__(self):
+        return len(self._keys)
+
+
+suggest_index = PrefixIndex()
@@ -0,0 +1,53 @@
+# şablon derleme: disk üzerinde paylaşılan Jinja bytecode önbelleği ve açılışta ön derleme
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+
+
+TEMPLATE_SUFFIXES = ('.html',)
+
+
+def precompile_templates(app):
+    """Compiles every template once so the first request does not pay for it.
+
+    With a bytecode cache configured this also fills the cache directory,
+    so later workers load bytecode instead of parsing the source. Returns
+    (template count, seconds).
+    """
+    start = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates() if name.endswith(TEMPLATE_SUFFIXES)]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), time.perf_counter() - start
+
+
+def init_app(app):
+    # Tüm worker'ların okuyabildiği bir dizin; Jinja dosyaları atomik yazar ve kaynak değişince yeniden derler
+    app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', None)
+    app.config.setdefault('TEMPLATE_WARM_UP', False)
+
+    directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def warm_up(app):
+    """Runs precompile_templates when TEMPLATE_WARM_UP is set; call after every extension is registered."""
+    if app.config['TEMPLATE_WARM_UP']:
+        count, seconds = precompile_templates(app)
+        app.logger.info('%s şablon %.0f ms içinde derlendi', count, seconds * 1000)
+
+
+@click.command('templates-compile')
+@with_appcontext
+def templates_compile_command():
+    """Compile every template into the bytecode cache (run once per deploy)."""
+    if not current_app.config['JINJA_BYTECODE_CACHE_DIR']:
+        click.echo('JINJA_BYTECODE_CACHE_DIR ayarlı değil; derleme yalnızca bu süreçte kalır.')
+    count, seconds = precompile_templates(current_app)
+    click.echo(f'{count} şablon {seconds * 1000:.0f} ms içinde derlendi.')
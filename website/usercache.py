@@ -0,0 +1,85 @@
+# Flask-Login kullanıcı yükleyicisi için kısa ömürlü kimlik önbelleği; yalnızca paylaşılan depoda (Redis) varsayılan açık
+import threading
+
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from .kvstore import kv_store
+from .models import Customer
+from . import db
+
+
+# Önbelleğe yalnızca kimlik alanları girer; password_hash gibi diğer sütunlar erişildiğinde yüklenir
+IDENTITY_FIELDS = ('id', 'email', 'phone', 'first_name', 'last_name', 'is_banned')
+DEFAULT_TTL = 60
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _key(customer_id):
+    return f'user:{customer_id}'
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def load_customer(customer_id):
+    """Returns the Customer for ``current_user``, from the cache when possible.
+
+    A cached identity is re-attached to the session without SQL, so
+    ``current_user`` behaves like a normal instance; columns outside
+    IDENTITY_FIELDS are loaded from the database only if they are used.
+    """
+    try:
+        customer_id = int(customer_id)
+    except (TypeError, ValueError):
+        return None
+
+    ttl = current_app.config['USER_CACHE_TTL']
+    if not ttl:
+        return db.session.get(Customer, customer_id)
+
+    existing = db.session.identity_map.get(identity_key(Customer, customer_id))
+    if existing is not None:
+        return existing
+
+    row = kv_store().get(_key(customer_id))
+    if row is not None:
+        _count('hits')
+        customer = Customer(**row)
+        make_transient_to_detached(customer)
+        return db.session.merge(customer, load=False)
+
+    _count('misses')
+    customer = db.session.get(Customer, customer_id)
+    if customer is not None:
+        kv_store().set(_key(customer_id), {field: getattr(customer, field) for field in IDENTITY_FIELDS},
+                       ttl=ttl)
+    return customer
+
+
+def invalidate_user(customer_id):
+    """Drops the cached identity; call after committing a change to the customer.
+
+    The delete reaches every worker only through a shared store, which is
+    why the cache is off by default on the in-process one.
+    """
+    kv_store().delete(_key(customer_id))
+    _count('invalidations')
+
+
+def stats():
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return dict(_stats, hit_rate=round(_stats['hits'] / lookups, 4) if lookups else 0.0)
+
+
+def init_app(app):
+    # saniye, 0: önbellek kapalı. Süreç içi depoda yasaklama ve şifre değişikliği diğer worker'lara
+    # TTL dolana kadar ulaşmazdı; bu yüzden yalnızca paylaşılan depoda (KV_STORE_URL) varsayılan olarak açık
+    shared = app.extensions['kvstore'].shared
+    app.config.setdefault('USER_CACHE_TTL', DEFAULT_TTL if shared else 0)
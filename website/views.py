@@ -1,37 +1,36 @@
-from flask import Blueprint, render_template, flash, redirect, request, jsonify
-from .models import Product, Cart, Order, Address, Card, Coupon, Favorite
+from flask import Blueprint, render_template, flash, redirect, request, jsonify, current_app
+from .models import Product, Cart, Order, Address, Card, Coupon
 from flask_login import login_required, current_user
 from . import db
-from intasend import APIService
+from .search import search_products
+from .cache import product_cache
+from .favorites import favorite_ids, apply_favorite_changes, FavoriteError
+from .pagination import paginate_keyset
+from .sales import top_sellers
+from .cart import apply_cart_ops, CartOpError, SHIPPING_COST
+from .checkout import checkout_cart, CheckoutError, EmptyCartError
+from .idempotency import idempotent
+from .payments import payment_dispatcher, apply_gateway_states, new_payment_reference, PENDING_PAYMENT_STATUS
+from .mail import mailer
+from .ratelimit import rate_limited
+from .suggest import suggest_index, DEFAULT_LIMIT as SUGGEST_LIMIT
 from datetime import datetime
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import hmac
 
 views = Blueprint('views', __name__)
 
-API_PUBLISHABLE_KEY = os.getenv('INTASEND_PUBLISHABLE_KEY')
-API_TOKEN = os.getenv('INTASEND_API_TOKEN')
-
 
 @views.context_processor
 def inject_favorites():
     if current_user.is_authenticated:
-        favorites = Favorite.query.filter_by(customer_link=current_user.id).all()
-        fav_ids = [fav.product_link for fav in favorites]
-        return dict(user_favorites=fav_ids)
-    return dict(user_favorites=[])
+        return dict(user_favorites=favorite_ids(current_user.id))
+    return dict(user_favorites=frozenset())
 
 
 @views.route('/favorites')
 @login_required
 def favorites():
-    user_favorites = Favorite.query.filter_by(customer_link=current_user.id).all()
-    # We need to get the actual product objects.
-    # Assuming Favorite has product_link which is the ID.
-    # Better to join or just query Products where id in list.
-    fav_product_ids = [f.product_link for f in user_favorites]
+    fav_product_ids = favorite_ids(current_user.id)
     if fav_product_ids:
         products = Product.query.filter(Product.id.in_(fav_product_ids)).all()
     else:
@@ -40,26 +39,33 @@ def favorites():
     return render_template('favs.html', items=products)
 
 
+@views.route('/favorites/update', methods=['POST'])
+@login_required
+def update_favorites():
+    data = request.get_json(silent=True) or {}
+    try:
+        added, removed, favorites = apply_favorite_changes(current_user.id, add=data.get('add'),
+                                                           remove=data.get('remove'), toggle=data.get('toggle'),
+                                                           replace=data.get('set'))
+    except FavoriteError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'added': added, 'removed': removed, 'favorites': favorites.tolist()})
+
+
 @views.route('/toggle-favorite/<int:item_id>')
 @login_required
 def toggle_favorite(item_id):
-    product = Product.query.get(item_id)
+    product = product_cache.get(item_id)
     if not product:
         flash('Ürün bulunamadı.', category='error')
         return redirect(request.referrer)
 
-    existing_fav = Favorite.query.filter_by(customer_link=current_user.id, product_link=item_id).first()
-    
-    if existing_fav:
-        db.session.delete(existing_fav)
-        db.session.commit()
-        flash(f'{product.product_name} favorilerden çıkarıldı.', category='info')
-    else:
-        new_fav = Favorite(customer_link=current_user.id, product_link=item_id)
-        db.session.add(new_fav)
-        db.session.commit()
+    added, _, _ = apply_favorite_changes(current_user.id, toggle=[item_id])
+    if added:
         flash(f'{product.product_name} favorilere eklendi.', category='success')
-    
+    else:
+        flash(f'{product.product_name} favorilerden çıkarıldı.', category='info')
+
     return redirect(request.referrer)
 
 
@@ -75,16 +81,20 @@ def landing():
 @login_required
 def home():
     """Main Shop Page (previously home)"""
-    items = Product.query.filter(Product.flash_sale != None).all()
+    # Günün fırsatları: indirimi en yüksek olanlar önce, ?min_discount=20 ile süzülebilir
+    min_discount = max(request.args.get('min_discount', 1, type=int), 1)
+    page = paginate_keyset(Product.query.filter(Product.discount_percent >= min_discount),
+                           [(Product.discount_percent, True), (Product.id, True)])
 
-    return render_template('home.html', items=items, cart=Cart.query.filter_by(customer_link=current_user.id).all()
+    return render_template('home.html', items=page.items, page=page,
+                           cart=Cart.query.filter_by(customer_link=current_user.id).all()
                            if current_user.is_authenticated else [])
 
 
 @views.route('/add-to-cart/<int:item_id>')
 @login_required
 def add_to_cart(item_id):
-    item_to_add = Product.query.get(item_id)
+    item_to_add = product_cache.get(item_id)
     if not item_to_add or not item_to_add.is_active:
         flash('Bu ürün şu anda temin edilemiyor.', category='error')
         return redirect(request.referrer)
@@ -128,129 +138,104 @@ def show_cart():
     return render_template('cart.html', cart=cart, amount=amount, total=amount+200)
 
 
-@views.route('/pluscart')
-@login_required
-def plus_cart():
-    if request.method == 'GET':
-        cart_id = request.args.get('cart_id')
-        cart_item = Cart.query.get(cart_id)
-        cart_item.quantity = cart_item.quantity + 1
-        db.session.commit()
-
-        cart = Cart.query.filter_by(customer_link=current_user.id).all()
+def _legacy_cart_op(op):
+    cart_id = request.args.get('cart_id')
+    try:
+        result = apply_cart_ops(current_user.id, [{'cart_id': cart_id, 'op': op}])
+    except CartOpError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'quantity': result['lines'].get(str(cart_id), 0),
+        'amount': result['amount'],
+        'total': result['total']
+    })
 
-        amount = 0
 
-        for item in cart:
-            amount += item.product.current_price * item.quantity
+@views.route('/cart/update', methods=['POST'])
+@login_required
+def update_cart():
+    data = request.get_json(silent=True) or {}
+    try:
+        result = apply_cart_ops(current_user.id, data.get('ops'))
+    except CartOpError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
 
-        data = {
-            'quantity': cart_item.quantity,
-            'amount': amount,
-            'total': amount + 200
-        }
 
-        return jsonify(data)
+@views.route('/pluscart')
+@login_required
+def plus_cart():
+    return _legacy_cart_op('plus')
 
 
 @views.route('/minuscart')
 @login_required
 def minus_cart():
-    if request.method == 'GET':
-        cart_id = request.args.get('cart_id')
-        cart_item = Cart.query.get(cart_id)
-        if cart_item.quantity > 1:
-            cart_item.quantity = cart_item.quantity - 1
-            db.session.commit()
-
-        cart = Cart.query.filter_by(customer_link=current_user.id).all()
-
-        amount = 0
-
-        for item in cart:
-            amount += item.product.current_price * item.quantity
-
-        data = {
-            'quantity': cart_item.quantity,
-            'amount': amount,
-            'total': amount + 200
-        }
-
-        return jsonify(data)
+    return _legacy_cart_op('minus')
 
 
 @views.route('removecart')
 @login_required
 def remove_cart():
-    if request.method == 'GET':
-        cart_id = request.args.get('cart_id')
-        cart_item = Cart.query.get(cart_id)
-        db.session.delete(cart_item)
-        db.session.commit()
-
-        cart = Cart.query.filter_by(customer_link=current_user.id).all()
-
-        amount = 0
-
-        for item in cart:
-            amount += item.product.current_price * item.quantity
-
-        data = {
-            'quantity': cart_item.quantity,
-            'amount': amount,
-            'total': amount + 200
-        }
-
-        return jsonify(data)
+    return _legacy_cart_op('remove')
 
 
 @views.route('/place-order')
 @login_required
+@idempotent
 def place_order():
-    customer_cart = Cart.query.filter_by(customer_link=current_user.id)
-    if customer_cart:
-        try:
-            total = 0
-            for item in customer_cart:
-                if not item.product.is_active:
-                    flash(f"'{item.product.product_name}' şu anda temin edilemiyor. Lütfen sepetinizden çıkarın.", category='error')
-                    return redirect('/cart')
-                total += item.product.current_price * item.quantity
-
-            service = APIService(token=API_TOKEN, publishable_key=API_PUBLISHABLE_KEY, test=True)
-            create_order_response = service.collect.mpesa_stk_push(phone_number='YOUR_NUMBER ', email=current_user.email,
-                                                                   amount=total + 200, narrative='Purchase of goods')
-
-            for item in customer_cart:
-                new_order = Order()
-                new_order.quantity = item.quantity
-                new_order.price = item.product.current_price
-                new_order.status = create_order_response['invoice']['state'].capitalize()
-                new_order.payment_id = create_order_response['id']
-
-                new_order.product_link = item.product_link
-                new_order.customer_link = item.customer_link
-
-                db.session.add(new_order)
-
-                product = Product.query.get(item.product_link)
-
-                product.in_stock -= item.quantity
-
-                db.session.delete(item)
+    # Sipariş ödeme beklerken oluşturulur, ağ geçidi çağrısı arka planda yapılır.
+    # Tutar, siparişe dönüşen satırlarla aynı işlemde hesaplanır
+    reference = new_payment_reference()
+    try:
+        _, amount = checkout_cart(current_user.id, payment_id=reference, status=PENDING_PAYMENT_STATUS)
+    except EmptyCartError:
+        flash('Your cart is Empty')
+        return redirect('/')
+    except CheckoutError as e:
+        flash(str(e), category='error')
+        return redirect('/cart')
 
-                db.session.commit()
+    payment_dispatcher.submit(reference, current_user.phone, current_user.email, amount + SHIPPING_COST)
+    flash('Order Placed Successfully')
+    return redirect('/orders')
 
-            flash('Order Placed Successfully')
 
-            return redirect('/orders')
-        except Exception as e:
-            print(e)
-            flash('Order not placed')
-            return redirect('/')
-    else:
-        flash('Your cart is Empty')
-        return redirect('/')
+@views.route('/payment-status/<payment_id>')
+@login_required
+def payment_status(payment_id):
+    statuses = [status for (status,) in db.session.query(Order.status).distinct()
+                .filter(Order.payment_id == payment_id, Order.customer_link == current_user.id)]
+    if not statuses:
+        return jsonify({'error': 'Ödeme bulunamadı'}), 404
+    return jsonify({'payment_id': payment_id, 'statuses': statuses,
+                    'pending': PENDING_PAYMENT_STATUS in statuses})
+
+
+@views.route('/payments/webhook', methods=['POST'])
+def payment_webhook():
+    # Tek olay ya da olay listesi: {"invoice_id": ..., "state": ..., "challenge": ...}
+    events = request.get_json(silent=True)
+    if isinstance(events, dict):
+        events = [events]
+    if not isinstance(events, list):
+        return jsonify({'error': 'Geçersiz gövde'}), 400
+
+    # Gizli anahtar ayarlı değilse webhook kapalıdır; herkes sipariş onaylayıp iptal edebilirdi
+    secret = current_app.config.get('PAYMENT_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'error': 'Webhook yapılandırılmamış'}), 403
+
+    states = {}
+    for event in events:
+        if not isinstance(event, dict) or not event.get('invoice_id'):
+            continue
+        if not hmac.compare_digest(str(event.get('challenge', '')), secret):
+            return jsonify({'error': 'Yetkisiz'}), 403
+        states[str(event['invoice_id'])] = str(event.get('state', '')).upper()
+
+    confirmed, failed = apply_gateway_states(states)
+    return jsonify({'confirmed': confirmed, 'failed': failed})
 
 
 @views.route('/apply-coupon', methods=['POST'])
@@ -337,55 +322,21 @@ from flask import session
 
 @views.route('/send-email-code', methods=['POST'])
 @login_required
+@rate_limited('send_email_code', identifier=lambda: current_user.id, json=True)
 def send_email_code():
-    import requests
-    
     code = str(random.randint(100000, 999999))
     session['email_code'] = code
-    
-    # Brevo API Config
-    url = "https://api.brevo.com/v3/smtp/email"
-    api_key = os.getenv('BREVO_API_KEY')
-    sender_email = os.getenv('BREVO_SENDER_EMAIL')
-    sender_name = os.getenv('BREVO_SENDER_NAME')
-    
-    # Payload
-    payload = {
-        "sender": {
-            "name": sender_name,
-            "email": sender_email
-        },
-        "to": [
-            {
-                "email": current_user.email,
-                "name": f"{current_user.first_name} {current_user.last_name}"
-            }
-        ],
-        "subject": "Ödeme Doğrulama Kodu",
-        "htmlContent": f"<html><body><h1>Doğrulama Kodunuz: {code}</h1><p>Bu kodu ödeme sayfasında giriniz.</p></body></html>"
-    }
-    
-    headers = {
-        "accept": "application/json",
-        "api-key": api_key,
-        "content-type": "application/json"
-    }
-    
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 201:
-            print(f"Email sent successfully to {current_user.email}")
-            return jsonify({'success': True, 'message': 'Email sent'})
-        else:
-            print(f"Brevo Error: {response.text}")
-            return jsonify({'success': False, 'message': 'Email sending failed'}), 500
-    except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({'success': False, 'message': 'System error'}), 500
+
+    # Yalnızca kuyruğa yazıyoruz, gönderimi arka plan işçisi yapar
+    mailer.send(to_email=current_user.email, to_name=f"{current_user.first_name} {current_user.last_name}",
+                subject="Ödeme Doğrulama Kodu",
+                html=f"<html><body><h1>Doğrulama Kodunuz: {code}</h1><p>Bu kodu ödeme sayfasında giriniz.</p></body></html>")
+    return jsonify({'success': True, 'message': 'Email queued'})
 
 
 @views.route('/process-payment', methods=['POST'])
 @login_required
+@idempotent
 def process_payment():
     selected_address_id = request.form.get('selected_address')
     saved_card_id = request.form.get('saved_card_id')
@@ -417,39 +368,21 @@ def process_payment():
             return redirect('/checkout')
 
     # If payment successful:
-    customer_cart = Cart.query.filter_by(customer_link=current_user.id).all()
-
-    # Check for inactive products before processing
-    for item in customer_cart:
-        if not item.product.is_active:
-            flash(f"'{item.product.product_name}' şu anda temin edilemiyor. Lütfen sepetinizden çıkarın.", category='error')
-            return redirect('/cart')
-    
     try:
         payment_id = f"PAY-{current_user.id}-{int(datetime.now().timestamp())}"
-        
-        for item in customer_cart:
-            new_order = Order()
-            new_order.quantity = item.quantity
-            new_order.price = item.product.current_price
-            new_order.status = "Onaylanmayı Bekliyor"
-            new_order.payment_id = payment_id
-            new_order.product_link = item.product_link
-            new_order.customer_link = item.customer_link
-            
-            db.session.add(new_order)
-            
-            product = Product.query.get(item.product_link)
-            product.in_stock -= item.quantity
-            
-            db.session.delete(item)
-            
-        db.session.commit()
+        checkout_cart(current_user.id, payment_id=payment_id, status="Onaylanmayı Bekliyor")
         flash('Siparişiniz başarıyla alındı!', category='success')
         return redirect('/orders')
-        
+
+    except EmptyCartError as e:
+        flash(str(e), category='error')
+        return redirect('/')
+    except CheckoutError as e:
+        flash(str(e), category='error')
+        return redirect('/cart')
     except Exception as e:
         print(f"Order error: {e}")
+        db.session.rollback()
         flash('Sipariş oluşturulurken bir hata oluştu.', category='error')
         return redirect('/checkout')
 
@@ -463,15 +396,32 @@ def order():
 
 @views.route('/search', methods=['GET', 'POST'])
 def search():
+    # POST: navbar formu, GET: sonuç sayfaları arası geçiş (?q=...&page=2)
     if request.method == 'POST':
         search_query = request.form.get('search')
-        items = Product.query.filter(Product.product_name.ilike(f'%{search_query}%')).all()
-        return render_template('search.html', items=items, cart=Cart.query.filter_by(customer_link=current_user.id).all()
-                           if current_user.is_authenticated else [])
+    else:
+        search_query = request.args.get('q')
+
+    if search_query is not None:
+        page = request.args.get('page', 1, type=int)
+        items, result = search_products(search_query, page=page)
+        return render_template('search.html', items=items, result=result, query=search_query,
+                               cart=Cart.query.filter_by(customer_link=current_user.id).all()
+                               if current_user.is_authenticated else [])
 
     return render_template('search.html')
 
 
+@views.route('/search/suggest')
+def search_suggest():
+    # Arama kutusu yazarken çağırır, bellekteki önek dizisinden döner; indeks sürümü
+    # süreç başına birkaç saniyede bir okunur, yenileme arka planda yapılır
+    prefix = request.args.get('q', '')
+    limit = request.args.get('limit', SUGGEST_LIMIT, type=int)
+    suggest_index.ensure_built()
+    return jsonify({'query': prefix, 'suggestions': suggest_index.complete(prefix, limit=limit)})
+
+
 
 
 
@@ -487,50 +437,40 @@ def search():
 @views.route('/category/<string:name>')
 @login_required
 def get_category(name):
-    items = Product.query.filter_by(category=name).all()
     user_cart = Cart.query.filter_by(customer_link=current_user.id).all()
-    
+
+    if name not in ('most_sellers', 'sales'):
+        # En yeni ürünler önce; (date_added, id) imleciyle sayfalanır
+        page = paginate_keyset(Product.query.filter_by(category=name),
+                               [(Product.date_added, True), (Product.id, True)])
+        items = page.items
+
     if name == 'electronics':
-        return render_template('category_template/electronics.html', items=items, cart=user_cart)
+        return render_template('category_template/electronics.html', items=items, page=page, cart=user_cart)
     elif name == 'home_living':
-        return render_template('category_template/home_living.html', items=items, cart=user_cart)
+        return render_template('category_template/home_living.html', items=items, page=page, cart=user_cart)
     elif name == 'fashion':
-        return render_template('category_template/fashion.html', items=items, cart=user_cart)
+        return render_template('category_template/fashion.html', items=items, page=page, cart=user_cart)
     elif name == 'gaming':
-         return render_template('category_template/gaming.html', items=items, cart=user_cart)
+         return render_template('category_template/gaming.html', items=items, page=page, cart=user_cart)
     elif name == 'accessories':
-         return render_template('category_template/accessories.html', items=items, cart=user_cart)
+         return render_template('category_template/accessories.html', items=items, page=page, cart=user_cart)
     elif name == 'beauty':
-         return render_template('category_template/beauty.html', items=items, cart=user_cart)
+         return render_template('category_template/beauty.html', items=items, page=page, cart=user_cart)
     elif name == 'sports_outdoor':
-         return render_template('category_template/sports_outdoor.html', items=items, cart=user_cart)
+         return render_template('category_template/sports_outdoor.html', items=items, page=page, cart=user_cart)
     
     elif name == 'most_sellers':
-        # Logic for best sellers: Count quantity of products in orders with specific status
-        from sqlalchemy import func, desc
-        # Assuming 'Teslim Edildi' or similar is the success status. 
-        # If 'Teslim Edildi' is strictly required: .filter(Order.status == 'Teslim Edildi')
-        # However, for broader display we might initially include confirmed orders too.
-        # User explicitly asked for "Teslim Edildi":
-        ranked_products = db.session.query(
-            Product, func.sum(Order.quantity).label('total_sold')
-        ).join(Order, Order.product_link == Product.id)\
-         .filter(Order.status == 'Teslim Edildi')\
-         .group_by(Product)\
-         .order_by(desc('total_sold')).all()
-         
-        # ranked_products is a list of tuples (Product, total_sold)
-        # We just need the product objects, maybe with rank info attached or just ordered list
-        items = [p[0] for p in ranked_products]
+        # Teslim edilen siparişlerden tutulan sayaçlar, önceden sıralı ilk N ürün
+        items = [product for product, total_sold in top_sellers()]
         return render_template('category_template/most_sellers.html', items=items, cart=user_cart)
 
     elif name == 'sales':
-        # Logic for sales: Sort by discount percentage descending
-        all_products = Product.query.filter(Product.previous_price > Product.current_price).all()
-        # Calculate discount % and sort
-        # Discount = (prev - curr) / prev
-        items = sorted(all_products, key=lambda p: (p.previous_price - p.current_price) / p.previous_price, reverse=True)
-        return render_template('category_template/sales.html', items=items, cart=user_cart)
+        # Logic for sales: Sort by discount percentage descending (stored, indexed column)
+        min_discount = max(request.args.get('min_discount', 1, type=int), 1)
+        page = paginate_keyset(Product.query.filter(Product.discount_percent >= min_discount),
+                               [(Product.discount_percent, True), (Product.id, True)])
+        return render_template('category_template/sales.html', items=page.items, page=page, cart=user_cart)
     
     # Fallback to electronics or generic if needed, or 404
-    return render_template('category_template/electronics.html', items=items, cart=user_cart)
+    return render_template('category_template/electronics.html', items=items, page=page, cart=user_cart)